@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from app.core.http_cache import record_dependency
+from app.core.settings import get_settings
+from app.core.single_flight import SingleFlight
+
+# Query parameters that carry credentials and must never end up in a cache key
+SECRET_PARAMS = {"api_key", "x_cg_pro_api_key", "apikey", "key"}
+
+
+class CachePolicy(NamedTuple):
+    """
+    ttl: Seconds a response is served as fresh.
+    stale: Extra seconds an expired response is still served while it is
+        refreshed in the background (stale-while-revalidate).
+    """
+    ttl: float
+    stale: float
+
+
+# Default policies per provider. Daily on-chain metrics barely move, market
+# snapshots and candles go stale within minutes.
+DEFAULT_POLICIES = {
+    "coingecko": CachePolicy(ttl=300, stale=3600),
+    "geckoterminal": CachePolicy(ttl=60, stale=300),
+    "glassnode": CachePolicy(ttl=3600, stale=86400),
+    "ccdata": CachePolicy(ttl=60, stale=300),
+    "aave": CachePolicy(ttl=900, stale=3600),
+    "microstrategy": CachePolicy(ttl=600, stale=3600),
+    "virtuals": CachePolicy(ttl=120, stale=600),
+}
+FALLBACK_POLICY = CachePolicy(ttl=60, stale=300)
+
+
+class CacheBackend:
+    """Interface for the storage behind ResponseCache. Entries are (stored_at, data)."""
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: Tuple[float, Any], expire: float):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process LRU backend. Cached values are shared, treat them as read-only."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        entry, expires_at = item
+        if time.time() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: Tuple[float, Any], expire: float):
+        self._entries[key] = (entry, time.time() + expire)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis backend shared by every worker, entries are stored as JSON."""
+
+    def __init__(self, url: str, prefix: str = "cryptobb:"):
+        self.url = url
+        self.prefix = prefix
+        self._redis = None
+
+    async def _get_redis(self):
+        if self._redis is None:
+            import aioredis
+            self._redis = await aioredis.create_redis_pool(self.url)
+        return self._redis
+
+    async def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        redis = await self._get_redis()
+        raw = await redis.get(self.prefix + key)
+        if raw is None:
+            return None
+        stored_at, data = json.loads(raw)
+        return stored_at, data
+
+    async def set(self, key: str, entry: Tuple[float, Any], expire: float):
+        redis = await self._get_redis()
+        await redis.set(self.prefix + key, json.dumps(entry), expire=max(1, int(expire)))
+
+    async def close(self):
+        if self._redis is not None:
+            self._redis.close()
+            await self._redis.wait_closed()
+            self._redis = None
+
+
+class ResponseCache:
+    """
+    Caches decoded upstream responses per provider.
+
+    Args:
+        backend (CacheBackend): Where entries are stored.
+        policies (Dict[str, CachePolicy]): TTL and stale window per provider.
+    """
+
+    def __init__(self, backend: CacheBackend, policies: Dict[str, CachePolicy] = None):
+        self.backend = backend
+        self.policies = {**DEFAULT_POLICIES, **(policies or {})}
+        # Identical requests in flight share one upstream call
+        self._flight = SingleFlight()
+        # Background refreshes, referenced until done so they aren't collected
+        self._refreshes: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def make_key(provider: str, url: str, params: Dict = None) -> str:
+        """Builds a cache key from the URL and params, leaving out API keys."""
+        parts = urlsplit(url.strip())
+        query = parse_qsl(parts.query) + [
+            (k, str(v)) for k, v in (params or {}).items() if v is not None
+        ]
+        query = sorted((k, v) for k, v in query if k.lower() not in SECRET_PARAMS)
+        return f"{provider}:{parts.netloc}{parts.path}?{urlencode(query)}"
+
+    def policy(self, provider: str, ttl: float = None) -> CachePolicy:
+        policy = self.policies.get(provider, FALLBACK_POLICY)
+        if ttl is not None:
+            policy = policy._replace(ttl=ttl)
+        return policy
+
+    async def _fetch_and_store(self, key: str, policy: CachePolicy, fetcher: Callable[[], Awaitable]):
+        data = await fetcher()
+        entry = (time.time(), data)
+        await self.backend.set(key, entry, policy.ttl + policy.stale)
+        return entry
+
+    async def _refresh(self, key: str, policy: CachePolicy, fetcher: Callable[[], Awaitable]):
+        try:
+            await self._flight.do(key, lambda: self._fetch_and_store(key, policy, fetcher))
+        except Exception:
+            # Keep serving the stale entry, the next request retries
+            pass
+
+    async def fetch(
+        self,
+        provider: str,
+        url: str,
+        params: Dict,
+        fetcher: Callable[[], Awaitable],
+        ttl: float = None
+    ) -> Any:
+        """
+        Returns the cached response for the request or calls fetcher to get it.
+
+        Args:
+            provider (str): Provider name used to pick the cache policy.
+            url (str): Request URL, part of the cache key.
+            params (Dict): Request params, part of the cache key.
+            fetcher (Callable): Coroutine function performing the request. It
+                should raise on failures so errors are never cached.
+            ttl (float): Optional. Overrides the provider TTL for this request.
+
+        Returns:
+            Any: The decoded response.
+        """
+        key = self.make_key(provider, url, params)
+        policy = self.policy(provider, ttl)
+
+        entry = await self.backend.get(key)
+        if entry is not None:
+            stored_at, data = entry
+            age = time.time() - stored_at
+            if age < policy.ttl:
+                record_dependency(key, stored_at, stored_at + policy.ttl)
+                return data
+            if age < policy.ttl + policy.stale:
+                if not self._flight.in_flight(key):
+                    task = asyncio.create_task(self._refresh(key, policy, fetcher))
+                    self._refreshes.add(task)
+                    task.add_done_callback(self._refreshes.discard)
+                # Being refreshed, the next request may already see new data
+                record_dependency(key, stored_at)
+                return data
+
+        stored_at, data = await self._flight.do(
+            key, lambda: self._fetch_and_store(key, policy, fetcher)
+        )
+        record_dependency(key, stored_at, stored_at + policy.ttl)
+        return data
+
+    async def close(self):
+        await self.backend.close()
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    settings = get_settings()
+    if settings.CACHE_BACKEND == "redis":
+        backend = RedisCacheBackend(settings.CACHE_REDIS_URL)
+    else:
+        backend = MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+
+    policies = {
+        provider: CachePolicy(*values)
+        for provider, values in settings.CACHE_POLICIES.items()
+    }
+    return ResponseCache(backend, policies)
@@ -0,0 +1,210 @@
+"""
+Server-side downsampling for long chart series.
+
+Charts are rarely more than a few hundred pixels wide, so drawing every point
+of a multi-year daily or minute-resolution history only inflates payloads and
+render times. These helpers reduce a DataFrame to a bounded number of rows
+before the figure is built:
+
+- Lines use Largest-Triangle-Three-Buckets (LTTB), which keeps the points that
+  define the visual shape of the series, or min/max buckets, which keep every
+  local extreme.
+- Candles and bars are merged into buckets, preserving open/high/low/close
+  and summing volumes, so no move or flow disappears from the chart.
+"""
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+# Smallest point budget accepted, the first and last points plus a bucket's
+# minimum and maximum
+MIN_POINTS = 4
+
+
+def _x_values(df: pd.DataFrame, x: Optional[str]) -> np.ndarray:
+    """X coordinates as floats, falling back to row positions for non-numeric axes."""
+    values = df.index if x is None else df[x]
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.astype("int64").to_numpy(dtype=float)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float)
+    return np.arange(len(values), dtype=float)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Selects max_points indices with Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept. Every other bucket keeps the
+    point forming the largest triangle with the previously kept point and
+    the average of the next bucket. NaN points are only kept from buckets
+    that contain nothing else.
+
+    Parameters:
+    - x (np.ndarray): X coordinates, increasing.
+    - y (np.ndarray): Y values.
+    - max_points (int): Number of points to keep.
+
+    Returns:
+    - np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+
+    # max_points - 2 buckets over the interior points
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    kept = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+        else:
+            next_start, next_end = n - 1, n
+
+        next_y = y[next_start:next_end]
+        finite = next_y[~np.isnan(next_y)]
+        avg_x = x[next_start:next_end].mean()
+        avg_y = finite.mean() if len(finite) else y[kept]
+
+        areas = np.abs(
+            (x[kept] - avg_x) * (y[start:end] - y[kept])
+            - (x[kept] - x[start:end]) * (avg_y - y[kept])
+        )
+        kept = start + int(np.argmax(np.where(np.isnan(areas), -1.0, areas)))
+        indices[bucket + 1] = kept
+
+    return indices
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Selects up to max_points indices keeping the minimum and maximum of
+    each bucket, plus the first and last points.
+
+    Parameters:
+    - y (np.ndarray): Y values.
+    - max_points (int): Maximum number of points to keep.
+
+    Returns:
+    - np.ndarray: Sorted indices of the kept points.
+    """
+    n = len(y)
+    if max_points >= n or max_points < 4:
+        return np.arange(n)
+
+    edges = np.linspace(0, n, (max_points - 2) // 2 + 1).astype(np.int64)
+    indices = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        chunk = y[start:end]
+        if len(chunk) == 0 or np.isnan(chunk).all():
+            continue
+        indices.append(start + int(np.nanargmin(chunk)))
+        indices.append(start + int(np.nanargmax(chunk)))
+
+    return np.unique(indices)
+
+
+def downsample_lines(
+    df: pd.DataFrame,
+    max_points: Optional[int],
+    columns: List[str],
+    x: Optional[str] = None,
+    method: str = "lttb"
+) -> pd.DataFrame:
+    """
+    Reduces a frame of line series to at most max_points rows.
+
+    With several columns the point budget is split between them and the
+    rows selected for any column are kept, so every series keeps its shape.
+
+    Parameters:
+    - df (pd.DataFrame): Rows sorted by x.
+    - max_points (int): Maximum number of rows to return. None or 0 returns
+      the frame unchanged.
+    - columns (List[str]): Columns plotted as lines.
+    - x (str): Optional. X column, the index is used by default.
+    - method (str): Optional. "lttb" (default) or "minmax".
+
+    Returns:
+    - pd.DataFrame: The selected rows, in their original order.
+    """
+    if not max_points or len(df) <= max_points:
+        return df
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    x_values = _x_values(df, x)
+    budget = max(max_points // len(columns), MIN_POINTS)
+    selected = []
+    for column in columns:
+        y_values = df[column].to_numpy(dtype=float)
+        if method == "lttb":
+            selected.append(lttb_indices(x_values, y_values, budget))
+        else:
+            selected.append(minmax_indices(y_values, budget))
+
+    # A copy, not a slice, so callers can add or convert columns freely
+    return df.iloc[np.unique(np.concatenate(selected))].copy()
+
+
+def downsample_buckets(
+    df: pd.DataFrame,
+    max_points: Optional[int],
+    agg: Dict[str, str]
+) -> pd.DataFrame:
+    """
+    Merges consecutive rows into at most max_points buckets.
+
+    Parameters:
+    - df (pd.DataFrame): Rows sorted by time.
+    - max_points (int): Maximum number of rows to return. None or 0 returns
+      the frame unchanged.
+    - agg (Dict[str, str]): Aggregation per column, e.g. "sum" for volumes.
+      Columns not listed keep the value of the first row of each bucket.
+
+    Returns:
+    - pd.DataFrame: One row per bucket, keeping the index of its first row.
+    """
+    if not max_points or len(df) <= max_points:
+        return df
+
+    buckets = np.arange(len(df)) * max_points // len(df)
+    agg = {column: agg.get(column, "first") for column in df.columns}
+    first_rows = df.index[np.searchsorted(buckets, np.arange(max_points))]
+    result = df.groupby(buckets).agg(agg)
+    result.index = first_rows
+    return result
+
+
+def downsample_ohlc(
+    df: pd.DataFrame,
+    max_points: Optional[int],
+    open: str = "open",
+    high: str = "high",
+    low: str = "low",
+    close: str = "close",
+    sum_columns: List[str] = ()
+) -> pd.DataFrame:
+    """
+    Merges candles into at most max_points wider candles, keeping the first
+    open, highest high, lowest low and last close of each bucket.
+
+    Parameters:
+    - df (pd.DataFrame): Candles sorted by time.
+    - max_points (int): Maximum number of candles to return. None or 0
+      returns the frame unchanged.
+    - open, high, low, close (str): Optional. Names of the price columns.
+    - sum_columns (List[str]): Optional. Columns summed per bucket, e.g.
+      volumes.
+
+    Returns:
+    - pd.DataFrame: The merged candles.
+    """
+    agg = {open: "first", high: "max", low: "min", close: "last"}
+    agg.update({column: "sum" for column in sum_columns})
+    return downsample_buckets(df, max_points, agg)
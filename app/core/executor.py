@@ -0,0 +1,90 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ExecutorSaturatedError(Exception):
+    """Raised when a BoundedExecutor already has its maximum number of calls pending."""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables on a dedicated thread pool so they don't stall the
+    event loop shared by every other route.
+
+    Args:
+        name (str): Prefix used for the worker thread names.
+        max_workers (int): Number of threads in the pool.
+        max_queue (int): Number of calls allowed to wait for a free thread.
+            Calls beyond max_workers + max_queue are rejected right away
+            instead of piling up behind a slow upstream.
+        timeout (float): Default number of seconds a caller waits for a
+            result before giving up.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, timeout: float):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or waiting for a thread."""
+        return self._pending
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=self.name
+            )
+        return self._pool
+
+    def _release(self, _future=None):
+        self._pending -= 1
+
+    async def run(self, func: Callable, *args, timeout: float = None, **kwargs) -> Any:
+        """
+        Runs func(*args, **kwargs) on the pool and awaits its result.
+
+        Args:
+            func (Callable): The blocking callable to run.
+            timeout (float): Optional. Overrides the default timeout for this call.
+
+        Returns:
+            Any: Whatever func returns.
+
+        Raises:
+            ExecutorSaturatedError: If the pool and its queue are full.
+            TimeoutError: If the call does not finish in time.
+        """
+        if self._pending >= self.max_workers + self.max_queue:
+            raise ExecutorSaturatedError(
+                f"{self.name} executor is saturated ({self._pending} calls pending)"
+            )
+
+        loop = asyncio.get_running_loop()
+        future = self._get_pool().submit(functools.partial(func, *args, **kwargs))
+        self._pending += 1
+        # The slot is freed when the thread actually finishes, not when the
+        # caller stops waiting, so timed out calls still count against the queue.
+        future.add_done_callback(
+            lambda f: loop.is_closed() or loop.call_soon_threadsafe(self._release, f)
+        )
+
+        timeout = self.timeout if timeout is None else timeout
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(
+                f"{self.name} call {getattr(func, '__name__', func)} timed out after {timeout}s"
+            )
+
+    def shutdown(self, wait: bool = False):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+from app.core.http_cache import record_dependency
+from app.core.settings import get_settings
+
+# File locks coordinate the workers sharing DATA_DIR, where available
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Table names are paths below DATA_DIR, e.g. "ccdata/exchange_volume/binance"
+_NAME_PART = re.compile(r"^[A-Za-z0-9_.-]+$")
+# Schema metadata key holding a table's own metadata
+_METADATA_KEY = b"cryptobb"
+# Seconds between attempts to take a table lock held by another worker
+_LOCK_POLL_INTERVAL = 0.05
+
+
+class HistoryStore:
+    """
+    Keeps long-lived time series on disk as one Arrow IPC file per table, so
+    history survives restarts and only the newest rows need fetching.
+
+    Tables are written uncompressed and read through a memory map, so the
+    numeric columns of every worker's frames point at the same page cache
+    instead of a private copy. Writes replace the file atomically and mapped
+    frames keep the old file alive until they are dropped.
+
+    The most recently used frames are memoized until their file changes,
+    at most `max_frames` of them. They are shared between callers and their
+    columns may be read-only, treat them as read-only and copy them before
+    modifying.
+
+    Args:
+        root (str): Directory the tables are stored in.
+        max_frames (int): Number of frames kept in memory.
+    """
+
+    def __init__(self, root: str, max_frames: int = 64):
+        self.root = Path(root)
+        self.max_frames = max_frames
+        self._frames: OrderedDict = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._writer_fd: Optional[int] = None
+
+    def _file(self, name: str, suffix: str) -> Path:
+        parts = name.split("/")
+        if not all(_NAME_PART.match(part) and part not in (".", "..") for part in parts):
+            raise ValueError(f"Invalid history table name: {name}")
+        return self.root.joinpath(*parts[:-1], parts[-1] + suffix)
+
+    def path(self, name: str) -> Path:
+        return self._file(name, ".arrow")
+
+    def _source(self, name: str) -> Optional[Path]:
+        """The file holding a table, tables written before the switch to Arrow are parquet."""
+        for path in (self.path(name), self._file(name, ".parquet")):
+            if path.exists():
+                return path
+        return None
+
+    @asynccontextmanager
+    async def lock(self, name: str):
+        """
+        Serializes the read-modify-write cycles of one table, within this
+        process and across the workers sharing DATA_DIR. A caller that had to
+        wait should check whether the table was refreshed in the meantime.
+        """
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            if fcntl is None:
+                yield
+                return
+            path = self._file(name, ".lock")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # Polled rather than blocking in a thread, so a cancelled
+                # waiter never ends up holding the lock
+                while True:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        break
+                    except BlockingIOError:
+                        await asyncio.sleep(_LOCK_POLL_INTERVAL)
+                yield
+            finally:
+                # Closing the file releases the lock
+                os.close(fd)
+
+    def is_writer(self) -> bool:
+        """
+        Whether this process refreshes tables in the background. The first
+        worker to ask holds a lock on DATA_DIR for as long as it runs, when it
+        exits the next worker to ask takes over.
+        """
+        if fcntl is None:
+            return True
+        if self._writer_fd is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.root / ".writer.lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            self._writer_fd = fd
+        return True
+
+    def updated_at(self, name: str) -> Optional[float]:
+        """Returns the time the table was last written, or None if it doesn't exist."""
+        path = self._source(name)
+        if path is None:
+            return None
+        try:
+            return path.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def age(self, name: str) -> float:
+        """Seconds since the table was last written, infinite if it doesn't exist."""
+        updated_at = self.updated_at(name)
+        return float("inf") if updated_at is None else time.time() - updated_at
+
+    def tables(self, prefix: str) -> List[str]:
+        """Lists the stored tables whose name starts with prefix/."""
+        directory = self.root.joinpath(*prefix.split("/"))
+        if not directory.is_dir():
+            return []
+        return sorted({
+            f"{prefix}/{path.stem}"
+            for pattern in ("*.arrow", "*.parquet")
+            for path in directory.glob(pattern)
+        })
+
+    def _remember(self, name: str, updated_at: float, df: pd.DataFrame, metadata: Dict):
+        self._frames[name] = (updated_at, df, metadata)
+        self._frames.move_to_end(name)
+        while len(self._frames) > self.max_frames:
+            self._frames.popitem(last=False)
+
+    def _cached(self, name: str, updated_at: Optional[float]) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        cached = self._frames.get(name)
+        if cached and cached[0] == updated_at:
+            self._frames.move_to_end(name)
+            return cached[1], cached[2]
+        return None
+
+    def _load(self, name: str) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        path = self._source(name)
+        if path is None:
+            return None
+        if path.suffix == ".parquet":
+            df, metadata = pd.read_parquet(path), {}
+        else:
+            with pa.memory_map(str(path)) as source:
+                table = pa.ipc.open_file(source).read_all()
+            raw = (table.schema.metadata or {}).get(_METADATA_KEY)
+            metadata = json.loads(raw) if raw else {}
+            # One block per column lets numeric columns stay views of the map
+            df = table.to_pandas(split_blocks=True)
+        return df, metadata
+
+    async def _get(self, name: str) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        # The memo is only touched on the event loop, files are read in a thread
+        updated_at = self.updated_at(name)
+        if updated_at is None:
+            return None
+        cached = self._cached(name, updated_at)
+        if cached:
+            return cached
+        result = await asyncio.to_thread(self._load, name)
+        if result is not None:
+            self._remember(name, updated_at, *result)
+        return result
+
+    def _write(self, name: str, df: pd.DataFrame, metadata: Optional[Dict]) -> float:
+        path = self.path(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if metadata:
+            table = table.replace_schema_metadata({
+                **(table.schema.metadata or {}), _METADATA_KEY: json.dumps(metadata)
+            })
+        # Write next to the target and rename, so readers never see a partial file
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+        self._file(name, ".parquet").unlink(missing_ok=True)
+        return path.stat().st_mtime
+
+    async def read(self, name: str, track: bool = True) -> Optional[pd.DataFrame]:
+        """
+        Returns the stored table, or None if it doesn't exist yet.
+
+        The frame is shared with other callers and its numeric columns are
+        usually views of the memory-mapped file, so writing into it in place
+        raises "ValueError: assignment destination is read-only". Copy it
+        before modifying it.
+
+        Args:
+            name (str): Table name.
+            track (bool): Optional. Records the table as a dependency of the
+                response being built, callers tracking their own freshness
+                turn this off.
+        """
+        if track:
+            record_dependency(f"history:{name}", self.updated_at(name))
+        result = await self._get(name)
+        return None if result is None else result[0]
+
+    async def read_metadata(self, name: str) -> Dict:
+        """Returns the metadata last written with the table, empty if there is none."""
+        result = await self._get(name)
+        return {} if result is None else result[1]
+
+    async def write(self, name: str, df: pd.DataFrame, metadata: Optional[Dict] = None):
+        """
+        Replaces the stored table.
+
+        Args:
+            name (str): Table name.
+            df (pd.DataFrame): The new table.
+            metadata (Dict): Optional. JSON-serializable values kept with the
+                table, see read_metadata.
+        """
+        df = df.reset_index(drop=True)
+        updated_at = await asyncio.to_thread(self._write, name, df, metadata)
+        self._remember(name, updated_at, df, metadata or {})
+
+    @staticmethod
+    def merge(stored: Optional[pd.DataFrame], df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        """Merges new rows into a table, replacing stored rows with the same keys."""
+        if stored is not None and not stored.empty:
+            df = pd.concat([stored, df], ignore_index=True)
+        return (
+            df.drop_duplicates(subset=keys, keep="last")
+            .sort_values(keys)
+            .reset_index(drop=True)
+        )
+
+    async def upsert(self, name: str, df: pd.DataFrame, keys: List[str]) -> pd.DataFrame:
+        """
+        Merges new rows into the stored table, new rows replacing stored rows
+        with the same keys.
+
+        Args:
+            name (str): Table name.
+            df (pd.DataFrame): New rows.
+            keys (List[str]): Columns identifying a row, the table is kept
+                sorted by them.
+
+        Returns:
+            pd.DataFrame: The merged table.
+        """
+        async with self.lock(name):
+            df = self.merge(await self.read(name), df, keys)
+            await self.write(name, df)
+            return df
+
+
+@lru_cache
+def get_history_store() -> HistoryStore:
+    settings = get_settings()
+    return HistoryStore(settings.DATA_DIR, max_frames=settings.HISTORY_MAX_FRAMES)
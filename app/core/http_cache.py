@@ -0,0 +1,290 @@
+import asyncio
+import gzip
+import hashlib
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.responses import TYPED_ARRAYS_HEADER
+from app.core.settings import get_settings
+
+# Optional codecs, offered only when installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+settings = get_settings()
+
+# Upstream snapshots read while building the current response
+_dependencies: ContextVar[Optional[List[Tuple[str, Any, Optional[float]]]]] = ContextVar(
+    "response_dependencies", default=None
+)
+
+_COMPRESSIBLE_TYPES = (b"application/json", b"text/", b"application/javascript")
+_ENCODING_SUFFIXES = ("-zstd", "-br", "-gzip")
+
+
+def record_dependency(key: str, version: Any, fresh_until: Optional[float] = None):
+    """
+    Notes that the response being built uses a cached upstream snapshot.
+    While all of a response's snapshots are fresh, requests matching its
+    ETag are answered before the route runs.
+
+    Args:
+        key (str): Identifies the snapshot, e.g. a response cache key.
+        version (Any): Changes whenever the snapshot is replaced.
+        fresh_until (float): Optional. Wall-clock time until which the snapshot
+            is served without being refetched. Responses whose snapshots are
+            all still fresh are answered with 304 without running the route.
+    """
+    dependencies = _dependencies.get()
+    if dependencies is not None:
+        dependencies.append((key, version, fresh_until))
+
+
+def record_untracked(source: str):
+    """
+    Notes that the response being built uses data whose freshness isn't
+    tracked, e.g. rows fetched straight from a provider. Such responses
+    still get ETags but always run their route.
+    """
+    record_dependency(f"untracked:{source}", None)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _etag_match(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Returns the validator of If-None-Match matching etag, ignoring the
+    encoding suffix CompressionMiddleware adds, or None if none matches.
+    """
+    if if_none_match.strip() == "*":
+        return etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        tag = candidate.strip('"')
+        for suffix in _ENCODING_SUFFIXES:
+            if tag.endswith(suffix):
+                tag = tag[:-len(suffix)]
+                break
+        if f'"{tag}"' == etag:
+            return candidate
+    return None
+
+
+class ConditionalGetMiddleware:
+    """
+    Adds strong ETags to successful GET responses and answers matching
+    If-None-Match requests with 304 Not Modified.
+
+    A response's ETag is derived from its body. While every upstream
+    snapshot behind the last response to a request is still fresh (see
+    record_dependency), a matching request is answered before the route
+    runs, so the figure isn't rebuilt at all. Responses that used untracked
+    data, or no snapshot at all, are always rebuilt.
+
+    A 304 repeats the validator the client sent, so it carries the same
+    encoding suffix as the 200 response the client cached.
+    """
+
+    def __init__(self, app, max_entries: int = 4096):
+        self.app = app
+        self.max_entries = max_entries
+        # Request key -> (etag, fresh_until)
+        self._validators: OrderedDict = OrderedDict()
+
+    @staticmethod
+    def _request_key(scope) -> str:
+        typed_arrays = _header(scope, TYPED_ARRAYS_HEADER.encode()) or ""
+        query = scope.get("query_string", b"").decode("latin-1")
+        return f"{scope['path']}?{query}|{typed_arrays}"
+
+    @staticmethod
+    def _etag(request_key: str, body: bytes) -> str:
+        digest = hashlib.blake2b(request_key.encode(), digest_size=16)
+        digest.update(body)
+        return f'"{digest.hexdigest()}"'
+
+    def _remember(self, request_key: str, etag: str, fresh_until: Optional[float]):
+        self._validators[request_key] = (etag, fresh_until)
+        self._validators.move_to_end(request_key)
+        while len(self._validators) > self.max_entries:
+            self._validators.popitem(last=False)
+
+    @staticmethod
+    async def _send_not_modified(send, etag: str):
+        await send({
+            "type": "http.response.start",
+            "status": 304,
+            "headers": [(b"etag", etag.encode())],
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        request_key = self._request_key(scope)
+        if_none_match = _header(scope, b"if-none-match")
+
+        validator = self._validators.get(request_key)
+        if if_none_match and validator:
+            etag, fresh_until = validator
+            if fresh_until is not None and time.time() < fresh_until:
+                matched = _etag_match(if_none_match, etag)
+                if matched:
+                    await self._send_not_modified(send, matched)
+                    return
+
+        dependencies = []
+        start = {}
+        chunks = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                if message["status"] != 200:
+                    await send(message)
+                return
+            if message["type"] != "http.response.body" or start["status"] != 200:
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            etag = self._etag(request_key, body)
+            fresh_until = None
+            if dependencies and all(dep[2] is not None for dep in dependencies):
+                fresh_until = min(dep[2] for dep in dependencies)
+            self._remember(request_key, etag, fresh_until)
+
+            matched = _etag_match(if_none_match, etag) if if_none_match else None
+            if matched:
+                await self._send_not_modified(send, matched)
+                return
+
+            headers = [(k, v) for k, v in start["headers"] if k != b"etag"]
+            headers.append((b"etag", etag.encode()))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        token = _dependencies.set(dependencies)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _dependencies.reset(token)
+
+
+def _parse_accept_encoding(value: str) -> Dict[str, float]:
+    accepted = {}
+    for part in value.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "br":
+        # Quality 5 keeps most of brotli's gain at a fraction of the CPU of 11
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressionMiddleware:
+    """
+    Compresses JSON and text responses with the best encoding the client
+    accepts: zstd or brotli when their packages are installed, else gzip.
+
+    Args:
+        minimum_size (int): Optional. Smaller bodies are sent as is.
+    """
+
+    def __init__(self, app, minimum_size: int = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.encodings = [
+            name for name, available in (("zstd", zstandard), ("br", brotli), ("gzip", gzip))
+            if available is not None
+        ]
+
+    def _negotiate(self, scope) -> Optional[str]:
+        accepted = _parse_accept_encoding(_header(scope, b"accept-encoding") or "")
+        for encoding in self.encodings:
+            if accepted.get(encoding, accepted.get("*", 0)) > 0:
+                return encoding
+        return None
+
+    async def __call__(self, scope, receive, send):
+        encoding = self._negotiate(scope) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = {}
+        chunks = []
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            headers = list(start.get("headers", []))
+            names = {name for name, _ in headers}
+            content_type = next((v for k, v in headers if k == b"content-type"), b"")
+            if (
+                len(body) >= self.minimum_size
+                and b"content-encoding" not in names
+                and content_type.startswith(_COMPRESSIBLE_TYPES)
+            ):
+                if len(body) > 1 << 18:
+                    # Large figures would block the event loop for tens of ms
+                    body = await asyncio.to_thread(_compress, body, encoding)
+                else:
+                    body = _compress(body, encoding)
+                headers = [
+                    # Each encoding is a different representation of the resource
+                    (k, v[:-1] + f'-{encoding}"'.encode() if k == b"etag" else v)
+                    for k, v in headers if k != b"content-length"
+                ]
+                headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"content-length", str(len(body)).encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,468 @@
+import copy
+import math
+from collections import deque
+from typing import Dict, List, Tuple
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Batch versions, computing an indicator over a whole series at once
+
+def rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    """RSI using simple moving averages of gains and losses."""
+    delta = close.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    return 100 - (100 / (1 + rs))
+
+
+def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
+    """MACD line, signal line and histogram."""
+    line = close.ewm(span=fast, adjust=False).mean() - close.ewm(span=slow, adjust=False).mean()
+    signal_line = line.ewm(span=signal, adjust=False).mean()
+    return pd.DataFrame({'MACD': line, 'Signal': signal_line, 'Histogram': line - signal_line})
+
+
+def stochastic(
+    high: pd.Series,
+    low: pd.Series,
+    close: pd.Series,
+    period: int = 14,
+    smooth: int = 3
+) -> pd.DataFrame:
+    """Stochastic oscillator %K and its moving average %D."""
+    low_min = low.rolling(window=period).min()
+    high_max = high.rolling(window=period).max()
+    denominator = (high_max - low_min).replace(0, 1e-10)
+    k = 100 * ((close - low_min) / denominator)
+    return pd.DataFrame({'%K': k, '%D': k.rolling(window=smooth).mean()})
+
+
+# Array versions, taking 1-D series or 2-D (series x time) arrays with time
+# on the last axis, so many instruments are computed in one go
+
+def rolling_apply(values: np.ndarray, window: int, reducer) -> np.ndarray:
+    """Applies reducer over trailing windows, NaN until a window is full."""
+    values = np.asarray(values, dtype=float)
+    result = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        result[..., window - 1:] = reducer(sliding_window_view(values, window, axis=-1), axis=-1)
+    return result
+
+
+def sma_array(values: np.ndarray, window: int) -> np.ndarray:
+    return rolling_apply(values, window, np.mean)
+
+
+def ema_array(values: np.ndarray, span: int) -> np.ndarray:
+    """EMA matching pandas' ewm(span, adjust=False), starting at the first number."""
+    values = np.asarray(values, dtype=float)
+    frame = pd.DataFrame(np.atleast_2d(values).T)
+    return frame.ewm(span=span, adjust=False).mean().to_numpy().T.reshape(values.shape)
+
+
+def rsi_array(close: np.ndarray, period: int = 14) -> np.ndarray:
+    close = np.asarray(close, dtype=float)
+    delta = np.full(close.shape, np.nan)
+    delta[..., 1:] = np.diff(close, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gain = sma_array(np.where(delta > 0, delta, 0.0), period)
+        loss = sma_array(np.where(delta < 0, -delta, 0.0), period)
+        return 100 - (100 / (1 + gain / loss))
+
+
+def macd_array(
+    close: np.ndarray,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the MACD line, signal line and histogram."""
+    line = ema_array(close, fast) - ema_array(close, slow)
+    signal_line = ema_array(line, signal)
+    return line, signal_line, line - signal_line
+
+
+def stochastic_array(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    period: int = 14,
+    smooth: int = 3
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns %K and %D."""
+    low_min = rolling_apply(low, period, np.min)
+    high_max = rolling_apply(high, period, np.max)
+    denominator = high_max - low_min
+    denominator[denominator == 0] = 1e-10
+    k = 100 * ((np.asarray(close, dtype=float) - low_min) / denominator)
+    return k, sma_array(k, smooth)
+
+
+def bollinger_array(
+    close: np.ndarray,
+    window: int = 20,
+    num_std: float = 2
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the upper, middle and lower Bollinger bands (population std)."""
+    middle = sma_array(close, window)
+    std = rolling_apply(close, window, np.std)
+    return middle + num_std * std, middle, middle - num_std * std
+
+
+# Parameters each indicator takes, with their defaults
+INDICATOR_DEFAULTS = {
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+    "stoch": (14, 3),
+    "sma": (20,),
+    "ema": (20,),
+    "bbands": (20, 2),
+}
+# Indicators drawn over the price rather than in their own panel
+OVERLAY_INDICATORS = {"sma", "ema", "bbands"}
+MAX_INDICATOR_WINDOW = 1000
+MAX_INDICATORS = 20
+
+
+def parse_indicator_specs(spec: str) -> List[Tuple[str, Tuple[float, ...]]]:
+    """
+    Parses an indicator list such as "rsi:14,macd:12/26/9,bbands:20/2".
+    Omitted parameters take their defaults.
+
+    Raises:
+        ValueError: If an indicator or parameter is invalid.
+    """
+    specs = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, raw_params = item.partition(":")
+        name = name.strip().lower()
+        if name not in INDICATOR_DEFAULTS:
+            raise ValueError(
+                f"Unknown indicator '{name}', expected one of {', '.join(INDICATOR_DEFAULTS)}"
+            )
+
+        defaults = INDICATOR_DEFAULTS[name]
+        values = [value for value in raw_params.split("/") if value.strip()] if raw_params else []
+        if len(values) > len(defaults):
+            raise ValueError(f"{name} takes at most {len(defaults)} parameters")
+        try:
+            params = [float(value) for value in values]
+        except ValueError:
+            raise ValueError(f"Invalid parameters for {name}: {raw_params}")
+        params += defaults[len(params):]
+
+        # Every parameter is a window length except the band width
+        windows = params[:1] if name == "bbands" else params
+        if any(value <= 0 for value in params) or any(
+            value != int(value) or value > MAX_INDICATOR_WINDOW for value in windows
+        ):
+            raise ValueError(f"Invalid parameters for {name}: {raw_params}")
+        specs.append((name, tuple(int(v) if v == int(v) else v for v in params)))
+
+    if not specs:
+        raise ValueError("No indicators requested")
+    if len(specs) > MAX_INDICATORS:
+        raise ValueError(f"At most {MAX_INDICATORS} indicators can be requested at once")
+    return specs
+
+
+def indicator_label(name: str, params: Tuple[float, ...]) -> str:
+    return "_".join([name, *(str(param) for param in params)])
+
+
+def compute_indicator_set(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    specs: List[Tuple[str, Tuple[float, ...]]]
+) -> Dict[str, np.ndarray]:
+    """
+    Computes every requested indicator over the same candle arrays.
+
+    Returns:
+        Dict[str, np.ndarray]: One array per output, keyed by the indicator
+            label (e.g. "rsi_14") with a suffix for multi-output indicators
+            (e.g. "macd_12_26_9_signal").
+    """
+    results = {}
+    computed = set()
+    for name, params in specs:
+        label = indicator_label(name, params)
+        if label in computed:
+            continue
+        computed.add(label)
+        if name == "rsi":
+            results[label] = rsi_array(close, *params)
+        elif name == "sma":
+            results[label] = sma_array(close, *params)
+        elif name == "ema":
+            results[label] = ema_array(close, *params)
+        elif name == "macd":
+            outputs = macd_array(close, *params)
+            results.update(zip([f"{label}_line", f"{label}_signal", f"{label}_hist"], outputs))
+        elif name == "stoch":
+            outputs = stochastic_array(high, low, close, *params)
+            results.update(zip([f"{label}_k", f"{label}_d"], outputs))
+        elif name == "bbands":
+            outputs = bollinger_array(close, *params)
+            results.update(zip([f"{label}_upper", f"{label}_middle", f"{label}_lower"], outputs))
+    return results
+
+
+# Streaming versions, updated one bar at a time in O(1)
+
+class RollingMean:
+    """Mean of the last `window` values, NaN until the window is full of numbers."""
+
+    # Recompute the running sum from scratch this often to stop float drift
+    RESYNC_EVERY = 1024
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque()
+        self._total = 0.0
+        self._nans = 0
+        self._updates = 0
+
+    def update(self, value: float) -> float:
+        self._values.append(value)
+        if math.isnan(value):
+            self._nans += 1
+        else:
+            self._total += value
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            if math.isnan(old):
+                self._nans -= 1
+            else:
+                self._total -= old
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._total = math.fsum(v for v in self._values if not math.isnan(v))
+
+        if len(self._values) < self.window or self._nans:
+            return math.nan
+        return self._total / self.window
+
+
+class RollingExtreme:
+    """Minimum or maximum of the last `window` values, using a monotonic deque."""
+
+    def __init__(self, window: int, maximum: bool):
+        self.window = window
+        self.maximum = maximum
+        self._candidates = deque()  # (index, value), values monotonic
+        self._index = 0
+
+    def update(self, value: float) -> float:
+        if self.maximum:
+            while self._candidates and self._candidates[-1][1] <= value:
+                self._candidates.pop()
+        else:
+            while self._candidates and self._candidates[-1][1] >= value:
+                self._candidates.pop()
+        self._candidates.append((self._index, value))
+        if self._candidates[0][0] <= self._index - self.window:
+            self._candidates.popleft()
+        self._index += 1
+        if self._index < self.window:
+            return math.nan
+        return self._candidates[0][1]
+
+
+class EMA:
+    """Exponential moving average matching pandas' ewm(span, adjust=False)."""
+
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value = math.nan
+
+    def update(self, value: float) -> float:
+        if math.isnan(self.value):
+            self.value = value
+        elif not math.isnan(value):
+            self.value += self.alpha * (value - self.value)
+        return self.value
+
+
+class StreamingRSI:
+    def __init__(self, period: int = 14, smooth: int = 3):
+        self._previous = math.nan
+        self._gain = RollingMean(period)
+        self._loss = RollingMean(period)
+        self._average = RollingMean(smooth)
+
+    def update(self, close: float) -> Tuple[float, float]:
+        """Returns the RSI and its moving average."""
+        delta = close - self._previous
+        self._previous = close
+        gain = self._gain.update(delta if delta > 0 else 0.0)
+        loss = self._loss.update(-delta if delta < 0 else 0.0)
+
+        if math.isnan(gain) or math.isnan(loss) or gain == loss == 0:
+            value = math.nan
+        elif loss == 0:
+            value = 100.0
+        else:
+            value = 100 - (100 / (1 + gain / loss))
+        return value, self._average.update(value)
+
+
+class StreamingMACD:
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self._fast = EMA(fast)
+        self._slow = EMA(slow)
+        self._signal = EMA(signal)
+
+    def update(self, close: float) -> Tuple[float, float, float]:
+        """Returns the MACD line, signal line and histogram."""
+        line = self._fast.update(close) - self._slow.update(close)
+        signal = self._signal.update(line)
+        return line, signal, line - signal
+
+
+class StreamingStochastic:
+    def __init__(self, period: int = 14, smooth: int = 3):
+        self._low = RollingExtreme(period, maximum=False)
+        self._high = RollingExtreme(period, maximum=True)
+        self._average = RollingMean(smooth)
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, float]:
+        """Returns %K and %D."""
+        low_min = self._low.update(low)
+        high_max = self._high.update(high)
+        denominator = (high_max - low_min) or 1e-10
+        k = 100 * ((close - low_min) / denominator)
+        return k, self._average.update(k)
+
+
+class IndicatorState:
+    """Streaming RSI, MACD and stochastic of one candle series."""
+
+    COLUMNS = ['RSI', 'RSI_MA3', 'MACD', 'Signal', 'Histogram', '%K', '%D']
+
+    def __init__(self):
+        self.rsi = StreamingRSI()
+        self.macd = StreamingMACD()
+        self.stochastic = StreamingStochastic()
+
+    def update(self, high: float, low: float, close: float) -> Tuple[float, ...]:
+        return (
+            *self.rsi.update(close),
+            *self.macd.update(close),
+            *self.stochastic.update(high, low, close),
+        )
+
+
+class StreamingIndicators:
+    """
+    Keeps the indicator state of a candle series between requests, so a
+    refreshed frame only costs the bars added since the last call.
+
+    Every bar but the last is committed to the state. The last bar is still
+    in progress and may be revised by the next refresh, so it is evaluated on
+    a copy of the state instead. Committed rows are kept in NumPy buffers
+    that grow geometrically, so a refresh appends the new rows and returns a
+    frame copied from a slice of the buffer rather than rebuilt row by row.
+
+    Args:
+        max_rows (int): Number of committed output rows kept when the buffers
+            are moved, a refresh may extend them further back.
+    """
+
+    def __init__(self, max_rows: int = 4000):
+        self.max_rows = max_rows
+        self._reset()
+
+    def _reset(self):
+        self._state = IndicatorState()
+        self._timestamps = np.empty(0, dtype='datetime64[ns]')
+        self._rows = np.empty((0, len(IndicatorState.COLUMNS)))
+        self._size = 0
+
+    def _committed(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Timestamps and rows of the committed bars kept, oldest first."""
+        first = max(0, self._size - self.max_rows)
+        return self._timestamps[first:self._size], self._rows[first:self._size]
+
+    def _commit(self, timestamps: np.ndarray, rows: List[Tuple[float, ...]]):
+        """Appends committed rows, moving the kept ones to new buffers when full."""
+        if not rows:
+            return
+        if self._size + len(rows) > len(self._rows):
+            kept_timestamps, kept_rows = self._committed()
+            size = len(kept_rows) + len(rows)
+            self._timestamps = np.empty(2 * size, dtype=self._timestamps.dtype)
+            self._rows = np.empty((2 * size, self._rows.shape[1]))
+            self._timestamps[:len(kept_rows)] = kept_timestamps
+            self._rows[:len(kept_rows)] = kept_rows
+            self._size = len(kept_rows)
+        end = self._size + len(rows)
+        self._timestamps[self._size:end] = timestamps
+        self._rows[self._size:end] = rows
+        self._size = end
+
+    def _resume_position(self, timestamps: np.ndarray) -> int:
+        """Position in the frame of the first bar not committed yet, or -1 to start over."""
+        committed, _ = self._committed()
+        if not len(committed) or timestamps[0] < committed[0]:
+            return -1
+        position = int(np.searchsorted(timestamps, committed[-1]))
+        if position >= len(timestamps) or timestamps[position] != committed[-1]:
+            return -1
+        return position + 1
+
+    def update(self, candles: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns the indicators of a candle frame.
+
+        Args:
+            candles (pd.DataFrame): TIMESTAMP, HIGH, LOW and CLOSE columns,
+                oldest first.
+
+        Returns:
+            pd.DataFrame: One column per IndicatorState.COLUMNS entry, aligned
+                with the rows of candles.
+        """
+        if candles.empty:
+            return pd.DataFrame(columns=IndicatorState.COLUMNS)
+
+        timestamps = candles['TIMESTAMP'].to_numpy(dtype='datetime64[ns]')
+        start = self._resume_position(timestamps)
+        if start < 0:
+            self._reset()
+            start = 0
+
+        start = min(start, len(candles) - 1)
+        values = candles[['HIGH', 'LOW', 'CLOSE']].to_numpy(dtype=float)
+        self._commit(
+            timestamps[start:-1],
+            [self._state.update(*bar) for bar in values[start:-1]]
+        )
+        provisional = copy.deepcopy(self._state).update(*values[-1])
+
+        # The whole buffer, kept rows and the ones just committed
+        committed, rows = self._timestamps[:self._size], self._rows[:self._size]
+        first = int(np.searchsorted(committed, timestamps[0]))
+        if len(rows) - first + 1 != len(candles):
+            # The stored bars don't line up with the frame (gaps or revisions)
+            self._reset()
+            return self.update(candles)
+        result = np.empty((len(candles), rows.shape[1]))
+        result[:-1] = rows[first:]
+        result[-1] = provisional
+        return pd.DataFrame(result, columns=IndicatorState.COLUMNS, index=candles.index)
+
+
+def compute_indicators(candles: pd.DataFrame) -> pd.DataFrame:
+    """Batch counterpart of StreamingIndicators.update."""
+    close = candles['CLOSE'].astype(float)
+    result = pd.DataFrame(index=candles.index)
+    result['RSI'] = rsi(close)
+    result['RSI_MA3'] = result['RSI'].rolling(window=3).mean()
+    result = result.join(macd(close))
+    return result.join(stochastic(candles['HIGH'].astype(float), candles['LOW'].astype(float), close))
@@ -4,6 +4,9 @@ Plotly config settings for consistent chart behavior.
 This module provides standardized configuration options for Plotly charts,
 ensuring consistent interactivity, responsiveness, and appearance.
 """
+import re
+from functools import lru_cache
+from app.core.settings import get_settings
 
 def create_base_layout(
     x_title: str, 
@@ -310,3 +313,115 @@ def apply_config_to_figure(figure, theme="dark"):
     
     # Return both the figure and the config
     return figure
+
+
+# Properties that accept plotly's "magic underscore" shorthand, e.g.
+# yaxis_type="log" for yaxis=dict(type="log") or line_color for line=dict(color=...)
+_CONTAINER_PROPERTY = re.compile(
+    r"^([xy]axis\d*|legend|margin|font|hoverlabel|modebar|transition|title|"
+    r"line|marker|increasing|decreasing|rangeslider)_(.+)$"
+)
+
+
+def _merge_property(target: dict, key: str, value):
+    """Sets target[key] = value the way Figure.update does, merging dicts."""
+    match = _CONTAINER_PROPERTY.match(key)
+    if match:
+        key, value = match.group(1), {match.group(2): value}
+    if key == "title" and isinstance(value, str):
+        # Plotly expands title strings to their text property
+        value = {"text": value}
+    if value is None:
+        # Like graph_objects, None unsets a property
+        target.pop(key, None)
+    elif isinstance(value, dict):
+        node = target.get(key)
+        if not isinstance(node, dict):
+            node = target[key] = {}
+        for child_key, child_value in value.items():
+            _merge_property(node, child_key, child_value)
+    else:
+        target[key] = value
+
+
+@lru_cache
+def get_default_template() -> dict:
+    """
+    Returns plotly's default template as a dict, the same one go.Figure embeds
+    in every serialized figure. Built once, it is costly to generate.
+    """
+    import plotly.graph_objects as go
+    return go.Figure().to_dict()["layout"]["template"]
+
+
+class FigureBuilder:
+    """
+    Builds Plotly figure dicts directly from NumPy/pandas columns, skipping
+    the per-property validation graph_objects runs on every call. The output
+    serializes to the same JSON as the equivalent go.Figure.
+
+    Parameters:
+    - layout (dict): Optional. Initial layout, usually from create_base_layout.
+      It is copied, not modified.
+    - validate (bool): Optional. Checks the finished figure with go.Figure,
+      raising on invalid properties. Defaults to the PLOTLY_VALIDATE setting,
+      meant for debugging.
+    """
+
+    def __init__(self, layout: dict = None, validate: bool = None):
+        self.data = []
+        self.layout = {}
+        self.update_layout(**(layout or {}))
+        self.validate = get_settings().PLOTLY_VALIDATE if validate is None else validate
+
+    def add_trace(self, trace_type: str, **properties) -> "FigureBuilder":
+        """Adds a trace of the given type, e.g. "scatter" or "candlestick"."""
+        trace = {"type": trace_type}
+        for key, value in properties.items():
+            _merge_property(trace, key, value)
+        self.data.append(trace)
+        return self
+
+    def add_scatter(self, **properties) -> "FigureBuilder":
+        return self.add_trace("scatter", **properties)
+
+    def add_bar(self, **properties) -> "FigureBuilder":
+        return self.add_trace("bar", **properties)
+
+    def add_candlestick(self, **properties) -> "FigureBuilder":
+        return self.add_trace("candlestick", **properties)
+
+    def update_layout(self, **properties) -> "FigureBuilder":
+        for key, value in properties.items():
+            _merge_property(self.layout, key, value)
+        return self
+
+    def _add_shape(self, shape: dict, properties: dict) -> "FigureBuilder":
+        for key, value in properties.items():
+            _merge_property(shape, key, value)
+        self.layout.setdefault("shapes", []).append(shape)
+        return self
+
+    def add_hline(self, y: float, **properties) -> "FigureBuilder":
+        """Horizontal line across the plot, like Figure.add_hline."""
+        shape = {"type": "line", "x0": 0, "x1": 1, "xref": "x domain", "y0": y, "y1": y, "yref": "y"}
+        return self._add_shape(shape, properties)
+
+    def add_hrect(self, y0: float, y1: float, **properties) -> "FigureBuilder":
+        """Horizontal band across the plot, like Figure.add_hrect."""
+        shape = {"type": "rect", "x0": 0, "x1": 1, "xref": "x domain", "y0": y0, "y1": y1, "yref": "y"}
+        return self._add_shape(shape, properties)
+
+    def apply_config(self, theme: str = "dark") -> "FigureBuilder":
+        """Same as apply_config_to_figure for a built figure."""
+        return self.update_layout(**get_layout_update(theme))
+
+    def to_dict(self) -> dict:
+        figure = {
+            "data": self.data,
+            "layout": {**self.layout, "template": get_default_template()},
+        }
+        if self.validate:
+            import plotly.graph_objects as go
+            go.Figure(figure)
+        return figure
@@ -0,0 +1,178 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+import aiohttp
+from app.core.settings import get_settings
+
+settings = get_settings()
+
+
+class GovernorConfig(NamedTuple):
+    """
+    rate: Requests per second allowed on average.
+    burst: Requests allowed back to back before the rate applies.
+    concurrency: Requests allowed in flight at once.
+    """
+    rate: float
+    burst: float
+    concurrency: int
+
+
+DEFAULT_GOVERNOR = GovernorConfig(rate=5, burst=10, concurrency=10)
+
+# Defaults sized to each vendor's published limits for our plans
+PROVIDER_GOVERNORS = {
+    "ccdata": GovernorConfig(rate=40, burst=80, concurrency=40),
+    "coingecko": GovernorConfig(rate=8, burst=20, concurrency=10),
+    "geckoterminal": GovernorConfig(rate=8, burst=20, concurrency=10),
+    "glassnode": GovernorConfig(rate=10, burst=20, concurrency=5),
+    "velo": GovernorConfig(rate=10, burst=20, concurrency=8),
+}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Waits until a token is available and takes it."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class ProviderGovernor:
+    """
+    Keeps requests to one provider under its rate and concurrency limits.
+
+    A 429 pauses every request to the provider for the Retry-After period
+    (or an exponential backoff without one) and halves the request rate.
+    Each successful response then recovers the rate gradually towards the
+    configured value.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        config: GovernorConfig,
+        max_retries: int = 5,
+        max_backoff: float = 60.0
+    ):
+        self.name = name
+        self.config = config
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(config.rate, config.burst)
+        self.semaphore = asyncio.Semaphore(config.concurrency)
+        self.throttled = 0
+        self._consecutive_throttles = 0
+        self._paused_until = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds a concurrency slot and a rate token for the duration of a request."""
+        async with self.semaphore:
+            delay = self._paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.bucket.acquire()
+            yield
+
+    def backoff(self, retry_after: float = None):
+        """Registers a throttled response and pauses the provider accordingly."""
+        self.throttled += 1
+        self._consecutive_throttles += 1
+        if retry_after is None:
+            retry_after = min(self.max_backoff, 0.5 * 2 ** self._consecutive_throttles)
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        self.bucket.rate = max(self.config.rate / 16, self.bucket.rate / 2)
+
+    def success(self):
+        self._consecutive_throttles = 0
+        if self.bucket.rate < self.config.rate:
+            self.bucket.rate = min(self.config.rate, self.bucket.rate * 1.1)
+
+    async def get_json(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        params: Dict = None,
+        **kwargs
+    ) -> Tuple[int, Any]:
+        """
+        Performs a GET under the governor, retrying 429 responses.
+
+        Returns:
+            Tuple[int, Any]: The status code and the decoded JSON body (or
+                the raw text when the body isn't JSON).
+        """
+        for attempt in range(self.max_retries + 1):
+            async with self.slot():
+                async with session.get(url, params=params, **kwargs) as response:
+                    if response.status == 429 and attempt < self.max_retries:
+                        self.backoff(parse_retry_after(response.headers.get("Retry-After")))
+                        continue
+
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = await response.text()
+
+                    if response.status < 400:
+                        self.success()
+                    return response.status, data
+
+    def stats(self) -> Dict:
+        return {
+            "rate": self.bucket.rate,
+            "concurrency": self.config.concurrency,
+            "in_flight": self.config.concurrency - self.semaphore._value,
+            "throttled": self.throttled,
+        }
+
+
+_governors: Dict[str, ProviderGovernor] = {}
+
+
+def get_governor(provider: str) -> ProviderGovernor:
+    """Returns the shared governor of a provider, applying RATE_LIMITS overrides."""
+    if provider not in _governors:
+        config = PROVIDER_GOVERNORS.get(provider, DEFAULT_GOVERNOR)
+        override = settings.RATE_LIMITS.get(provider)
+        if override:
+            rate, burst, concurrency = override
+            config = GovernorConfig(rate, burst, int(concurrency))
+        _governors[provider] = ProviderGovernor(provider, config)
+    return _governors[provider]
+
+
+def get_governor_stats() -> Dict[str, Dict]:
+    return {name: governor.stats() for name, governor in _governors.items()}
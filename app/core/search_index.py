@@ -0,0 +1,80 @@
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Sequence, Set
+import numpy as np
+
+# Ranking tiers, lower is better. Within a tier shorter keys rank first.
+_EXACT, _PREFIX, _TRIGRAM = 0, 1000, 2000
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """
+    In-memory prefix and trigram index over a few text fields of a fixed
+    list of rows, e.g. the id, symbol and name of every coin.
+
+    Matches are ranked: exact matches of any field first, then prefix
+    matches, then rows sharing at least half of the query's trigrams, which
+    catches substrings and small typos. Ties keep the shorter key first,
+    then the original row order.
+
+    Args:
+        fields (List[Sequence[str]]): One sequence per searchable field,
+            each holding a value per row.
+    """
+
+    def __init__(self, fields: List[Sequence[str]]):
+        self.size = len(fields[0]) if fields else 0
+        # Per field: sorted lowercase keys, their rows and their lengths
+        self._sorted = []
+        postings: Dict[str, List[int]] = defaultdict(list)
+        for field in fields:
+            keys = [str(value or "").lower() for value in field]
+            order = sorted(range(self.size), key=keys.__getitem__)
+            sorted_keys = [keys[row] for row in order]
+            self._sorted.append((
+                sorted_keys,
+                np.array(order, dtype=np.int64),
+                np.array([len(key) for key in sorted_keys], dtype=np.int64),
+            ))
+            for row, key in enumerate(keys):
+                for gram in _trigrams(key):
+                    postings[gram].append(row)
+
+        self._postings = {
+            gram: np.unique(np.array(rows, dtype=np.int64)) for gram, rows in postings.items()
+        }
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Returns the rows matching a query, best match first. An empty query
+        matches every row in its original order.
+        """
+        query = query.strip().lower()
+        if not query:
+            return np.arange(self.size)
+
+        scores = np.full(self.size, np.inf)
+        for keys, rows, lengths in self._sorted:
+            start = bisect_left(keys, query)
+            end = bisect_left(keys, query + "\uffff", lo=start)
+            if start == end:
+                continue
+            matched = rows[start:end]
+            tier = np.where(lengths[start:end] == len(query), _EXACT, _PREFIX)
+            np.minimum.at(scores, matched, tier + np.minimum(lengths[start:end], 999))
+
+        grams = _trigrams(query)
+        if grams:
+            matches = [self._postings[gram] for gram in grams if gram in self._postings]
+            if matches:
+                counts = np.bincount(np.concatenate(matches), minlength=self.size)
+                candidates = np.nonzero(counts * 2 >= len(grams))[0]
+                missing = len(grams) - counts[candidates]
+                np.minimum.at(scores, candidates, _TRIGRAM + missing * 100)
+
+        found = np.nonzero(np.isfinite(scores))[0]
+        return found[np.argsort(scores[found], kind="stable")]
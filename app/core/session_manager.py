@@ -1,33 +1,113 @@
-from typing import Optional
+from typing import Dict, Optional
 import aiohttp
 from contextlib import asynccontextmanager
+from app.core.settings import get_settings
+
+settings = get_settings()
+
+# Connection pool settings used for every provider unless overridden
+DEFAULT_POOL = {
+    "limit": 100,  # Total simultaneous connections
+    "limit_per_host": 20,  # Simultaneous connections to a single host
+    "keepalive_timeout": 30,  # Seconds an idle connection is kept open
+    "ttl_dns_cache": 300,  # Seconds DNS lookups are cached
+    "total_timeout": 60,  # Seconds for a whole request
+    "connect_timeout": 10,  # Seconds to establish a connection
+}
+
+# Per-provider overrides, so a fan-out to one host can't starve the others
+PROVIDER_POOLS = {
+    "ccdata": {"limit": 100, "limit_per_host": 50},
+    "coingecko": {"limit": 50, "limit_per_host": 25},
+    "geckoterminal": {"limit": 20, "limit_per_host": 10},
+    "glassnode": {"limit": 20, "limit_per_host": 10},
+    "velo": {"limit": 40, "limit_per_host": 20, "total_timeout": 120},
+    "aave": {"limit": 10, "limit_per_host": 10},
+    "microstrategy": {"limit": 10, "limit_per_host": 10},
+    "virtuals": {"limit": 10, "limit_per_host": 10},
+}
+
 
 class SessionManager:
     _instance = None
-    _session: Optional[aiohttp.ClientSession] = None
+    _sessions: Dict[str, aiohttp.ClientSession] = {}
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
         return cls._instance
 
+    @staticmethod
+    def get_pool_config(provider: str) -> Dict:
+        """Returns the pool settings for a provider, including SESSION_POOLS overrides."""
+        return {
+            **DEFAULT_POOL,
+            **PROVIDER_POOLS.get(provider, {}),
+            **settings.SESSION_POOLS.get(provider, {}),
+        }
+
+    @classmethod
+    async def get_session(
+        cls,
+        headers: dict = None,
+        provider: str = "default"
+    ) -> aiohttp.ClientSession:
+        """
+        Returns the session for a provider, creating it on first use with the
+        given default headers and that provider's connection pool.
+        """
+        session = cls._sessions.get(provider)
+        if session is None or session.closed:
+            config = cls.get_pool_config(provider)
+            connector = aiohttp.TCPConnector(
+                limit=int(config["limit"]),
+                limit_per_host=int(config["limit_per_host"]),
+                keepalive_timeout=config["keepalive_timeout"],
+                ttl_dns_cache=int(config["ttl_dns_cache"]),
+            )
+            timeout = aiohttp.ClientTimeout(
+                total=config["total_timeout"],
+                connect=config["connect_timeout"],
+            )
+            session = aiohttp.ClientSession(
+                headers=headers,
+                connector=connector,
+                timeout=timeout
+            )
+            cls._sessions[provider] = session
+        return session
+
     @classmethod
-    async def get_session(cls, headers: dict = None) -> aiohttp.ClientSession:
-        if cls._session is None or cls._session.closed:
-            cls._session = aiohttp.ClientSession(headers=headers)
-        return cls._session
+    def get_pool_stats(cls) -> Dict[str, Dict]:
+        """Returns connection pool usage for every open provider session."""
+        stats = {}
+        for provider, session in cls._sessions.items():
+            connector = session.connector
+            if session.closed or connector is None:
+                continue
+            stats[provider] = {
+                "limit": connector.limit,
+                "limit_per_host": connector.limit_per_host,
+                "in_use": len(getattr(connector, "_acquired", ())),
+                "idle": sum(len(conns) for conns in getattr(connector, "_conns", {}).values()),
+                "waiting": sum(len(waiters) for waiters in getattr(connector, "_waiters", {}).values()),
+            }
+        return stats
 
     @classmethod
-    async def close_session(cls):
-        if cls._session and not cls._session.closed:
-            await cls._session.close()
-            cls._session = None
+    async def close_session(cls, provider: Optional[str] = None):
+        """Closes the session of a provider, or every session if none is given."""
+        providers = [provider] if provider else list(cls._sessions)
+        for name in providers:
+            session = cls._sessions.pop(name, None)
+            if session and not session.closed:
+                await session.close()
 
     @classmethod
     @asynccontextmanager
-    async def get_session_context(cls, headers: dict = None):
-        session = await cls.get_session(headers)
+    async def get_session_context(cls, headers: dict = None, provider: str = "default"):
+        session = await cls.get_session(headers, provider)
         try:
             yield session
         finally:
-            pass  # We don't close the session here as it's reused 
\ No newline at end of file
+            pass  # We don't close the session here as it's reused
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -6,6 +7,45 @@ class Settings(BaseSettings):
     GLASSNODE_API_KEY: str = "your_api_key"
     VELO_API_KEY: str = "your_api_key"
     CCDATA_API_KEY: str = "your_api_key"
+    VELO_MAX_WORKERS: int = 8
+    VELO_MAX_QUEUE: int = 32
+    VELO_CALL_TIMEOUT: float = 60.0
+    VELO_CATALOG_TTL: int = 3600
+    VELO_QUERY_WINDOW: float = 0.05
+    VELO_QUERY_TTL: float = 30.0
+    VELO_TAIL_OVERLAP: int = 3
+    VELO_STORE_MAX_SERIES: int = 64
+    # Upstream response cache: "memory" or "redis"
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379"
+    CACHE_MAX_ENTRIES: int = 1024
+    # Per-provider [ttl, stale] overrides in seconds, e.g. {"glassnode": [3600, 86400]}
+    CACHE_POLICIES: Dict[str, List[float]] = {}
+    MICROSTRATEGY_REFRESH_INTERVAL: int = 600
+    # Per-provider connection pool overrides, e.g. {"ccdata": {"limit_per_host": 80}}
+    SESSION_POOLS: Dict[str, Dict[str, float]] = {}
+    # Per-provider [requests per second, burst, concurrency], e.g. {"ccdata": [20, 40, 20]}
+    RATE_LIMITS: Dict[str, List[float]] = {}
+    # Directory for locally persisted history (memory-mapped Arrow tables)
+    DATA_DIR: str = "data"
+    # History tables kept decoded in memory per worker
+    HISTORY_MAX_FRAMES: int = 64
+    EXCHANGE_VOLUME_REFRESH_INTERVAL: int = 3600
+    # Seconds a stored Glassnode metric is served before it is fetched again
+    GLASSNODE_REFRESH_INTERVAL: int = 3600
+    # Indicator scanner: parallel candle loads and instruments scanned at most
+    SCANNER_CONCURRENCY: int = 16
+    SCANNER_MAX_INSTRUMENTS: int = 500
+    # Validate figures built with FigureBuilder through go.Figure (debugging aid)
+    PLOTLY_VALIDATE: bool = False
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Seconds the indexed CoinGecko coin list is kept before it is rebuilt
+    COINGECKO_CATALOG_TTL: int = 3600
+    # Coin histories fetched in parallel by batch loads
+    COINGECKO_HISTORY_CONCURRENCY: int = 8
+    # Seconds a stored coin history is served before its latest days are fetched
+    COINGECKO_HISTORY_REFRESH_INTERVAL: int = 900
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls by key: while a call for a key is in flight,
+    later callers await the same result instead of starting their own.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]) -> Any:
+        """
+        Runs fn() unless a call for key is already running, then awaits it.
+
+        The shared call is shielded, so one caller being cancelled (e.g. a
+        client disconnecting) doesn't cancel it for the others.
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+
+            def _forget(done):
+                if self._calls.get(key) is done:
+                    del self._calls[key]
+                # Mark the exception as retrieved if every caller went away
+                if not done.cancelled():
+                    done.exception()
+
+            future.add_done_callback(_forget)
+
+        return await asyncio.shield(future)
@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,15 +10,19 @@ from app.core.registry import (
 )
 from app.routes.aave_routes import aave_router
 from app.routes.btc_matrix_routes import btc_matrix_router
-from app.routes.ccdata_routes import ccdata_router
+from app.routes.ccdata_routes import ccdata_router, ccdata_service
 from app.routes.coingecko_routes import coingecko_router
 from app.routes.geckoterminal_routes import geckoterminal_router
 from app.routes.glassnode_routes import glassnode_router
 from app.routes.google_trends_routes import google_trends_router
 from app.routes.microstrategy_routes import microstrategy_router
-from app.routes.velo_routes import velo_router
+from app.routes.velo_routes import velo_router, velo_service
 from app.routes.virtuals_routes import virtuals_router
 from app.core.session_manager import SessionManager
+from app.core.cache import get_response_cache
+from app.core.rate_limiter import get_governor_stats
+from app.core.responses import TypedArrayMiddleware
+from app.core.http_cache import CompressionMiddleware, ConditionalGetMiddleware
 from fastapi.responses import HTMLResponse
 from pathlib import Path
 
@@ -26,9 +31,13 @@ settings = get_settings()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: No need to create session here as it's created on first use
+    volume_refresher = asyncio.create_task(ccdata_service.maintain_exchange_volumes())
     yield
-    # Shutdown: Clean up the session
+    # Shutdown: Clean up the sessions and the Velo worker threads
+    volume_refresher.cancel()
     await SessionManager().close_session()
+    await get_response_cache().close()
+    velo_service.executor.shutdown()
 
 app = FastAPI(
     title="CryptoBB - Crypto Backend for OpenBB Workspace",
@@ -40,12 +49,21 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Middleware added last runs first:
+# - typed arrays let clients opt into binary encoding of chart data
+# - ETags and 304s for unchanged data, then compression of what is sent
+# - CORS outermost, so 304 responses still carry its headers
+app.add_middleware(TypedArrayMiddleware)
+app.add_middleware(ConditionalGetMiddleware)
+app.add_middleware(CompressionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Routes reporting partial failures in headers, readable by browser clients
+    expose_headers=["X-Failed-Coins", "X-Scan-Failed"],
 )
 
 @app.get("/")
@@ -123,6 +141,14 @@ app.include_router(
 
 print(f"\nLoading done.\n")
 
+@app.get("/pool-stats")
+async def get_pool_stats():
+    return SessionManager.get_pool_stats()
+
+@app.get("/rate-limits")
+async def get_rate_limits():
+    return get_governor_stats()
+
 @app.get("/widgets.json")
 async def get_widgets():
     return WIDGETS
@@ -6,9 +6,9 @@ from app.core.plotly_config import (
     create_base_layout
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
 import plotly.graph_objects as go
 import pandas as pd
-import json
 
 aave_router = APIRouter()
 aave_service = AaveService()
@@ -226,7 +226,7 @@ async def get_aave_lending_rate(
         # Apply the configuration to the figure
         figure = apply_config_to_figure(figure, theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -287,7 +287,7 @@ async def get_aave_utilization_rate(
         # Apply the configuration to the figure
         figure = apply_config_to_figure(figure, theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -348,7 +348,7 @@ async def get_aave_borrow_rate(
         # Apply the configuration to the figure
         figure = apply_config_to_figure(figure, theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -3,8 +3,8 @@ from fastapi import APIRouter, HTTPException
 from app.services.btc_matrix_service import BTCMatrixService
 from app.core.plotly_config import apply_config_to_figure
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
 import plotly.express as px
-import json
 
 
 btc_matrix_router = APIRouter()
@@ -134,7 +134,7 @@ async def get_btc_reserve_matrix(return_fig: bool = True, theme: str = "dark"):
     )
     
     if return_fig:
-        return json.loads(fig_reserves.to_json())
+        return FigureResponse(fig_reserves)
     else:
         return reserve_matrix
 
@@ -183,7 +183,7 @@ async def get_btc_reserve_matrix_pct(
     )
     
     if return_fig:
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     else:
         return pct_matrix
 
@@ -1,15 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 from app.services.ccdata_service import CCDataService
 from app.core.plotly_config import (
+    FigureBuilder,
     apply_config_to_figure, 
     get_chart_colors,
     create_base_layout
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
+from app.core.indicators import (
+    OVERLAY_INDICATORS,
+    compute_indicator_set,
+    indicator_label,
+    parse_indicator_specs
+)
 import plotly.graph_objects as go
 import pandas as pd
 from typing import List
-import json
 import asyncio
 import numpy as np
 
@@ -28,13 +35,46 @@ EXCHANGE_LIST = [
     {"label": "MEXC", "value": "mexc"}
 ]
 
+
+async def get_candle_frame(
+    exchange: str,
+    coin_id: str,
+    interval: str,
+    indicators: bool = False
+) -> pd.DataFrame:
+    """
+    Returns the cached candles of an instrument indexed by their formatted
+    timestamp, as used by every candle based widget. With indicators, the
+    RSI, MACD and stochastic columns are included.
+    """
+    if indicators:
+        data = await ccdata_service.get_indicator_frame(exchange, coin_id, interval)
+    else:
+        data = await ccdata_service.get_candles(exchange, coin_id, interval)
+    if data.empty:
+        raise ValueError(f"No candles found for {coin_id} on {exchange}")
+    data['TIMESTAMP'] = format_timestamps(data['TIMESTAMP'], interval)
+    return data.set_index("TIMESTAMP")
+
+
+def format_timestamps(timestamps: pd.Series, interval: str) -> pd.Series:
+    if interval in ("minutes", "hours"):
+        return timestamps.dt.strftime("%Y-%m-%d %H:%M:%S")
+    return timestamps.dt.strftime("%Y-%m-%d")
+
+
+def to_json_list(values: np.ndarray) -> list:
+    """Converts an array to a list, with None for NaN and infinite values."""
+    values = np.asarray(values, dtype=float)
+    return np.where(np.isfinite(values), values, None).tolist()
+
    
 @ccdata_router.get("/exchange-price-deltas")
 @register_widget({
     "name": "Exchange Price Deltas",
     "description": (
-        "This is the percent difference between the vwap price of BTC on each "
-        "exchange and the average price of BTC across those exchanges."
+        "This is the percent difference between the vwap price of an asset on each "
+        "exchange and the average price of that asset across those exchanges."
     ),
     "category": "crypto",
     "type": "chart",
@@ -42,18 +82,27 @@ EXCHANGE_LIST = [
     "widgetId": "ccdata/exchange-price-deltas",
     "gridData": {"w": 20, "h": 9},
     "source": "CCData",
+    "params": [
+        {
+            "paramName": "asset",
+            "value": "BTC",
+            "label": "Asset",
+            "show": True,
+            "description": "Base asset, quoted in USD and stablecoins on each exchange",
+        },
+    ],
     "data": {"chart": {"type": "line"}},
 })
-async def get_exchange_price_deltas(theme: str = "dark"):
+async def get_exchange_price_deltas(asset: str = "BTC", theme: str = "dark"):
     try:
-        data = await ccdata_service.get_delta_data()
+        data = await ccdata_service.get_delta_data(asset)
         data['timestamp'] = data['timestamp'].dt.strftime("%Y-%m-%d %H:%M:%S")
         data = data.set_index("timestamp")
 
         # Get chart colors based on theme
         colors = get_chart_colors(theme)
 
-        fig = go.Figure(
+        fig = FigureBuilder(
             layout=create_base_layout(
                 x_title="Date",
                 y_title="Delta",
@@ -94,16 +143,13 @@ async def get_exchange_price_deltas(theme: str = "dark"):
         )
 
         # Apply the standard configuration to the figure with theme
-        fig = apply_config_to_figure(fig, theme=theme)
+        fig.apply_config(theme)
 
         # Convert figure to JSON with the config
-        figure_json = fig.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(fig.to_dict())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
-    
+
 
 @ccdata_router.get("/candles")
 @register_widget({
@@ -149,25 +195,12 @@ async def get_ccdata_candles(
     theme: str = "dark"
 ):
     try:
-        data = await ccdata_service._fetch_spot_data(
-            (exchange, coin_id), 
-            interval=interval, 
-            aggregate=1, 
-            limit=2000
-        )
-        data = pd.DataFrame(data)
-        data = data[['TIMESTAMP', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']]
-        data['TIMESTAMP'] = pd.to_datetime(data['TIMESTAMP'], unit='s')
-        if interval == "minutes" or interval == "hours":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d %H:%M:%S")
-        elif interval == "day":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d")
-        data = data.set_index("TIMESTAMP")
+        data = await get_candle_frame(exchange, coin_id, interval)
 
         # Get chart colors based on theme
         colors = get_chart_colors(theme)
 
-        figure = go.Figure(
+        figure = FigureBuilder(
             layout=create_base_layout(
                 x_title="Date",
                 y_title="Price",
@@ -215,13 +248,10 @@ async def get_ccdata_candles(
         )
 
         # Apply the standard configuration to the figure with theme
-        figure = apply_config_to_figure(figure, theme=theme)
+        figure.apply_config(theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure.to_dict())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -258,7 +288,7 @@ async def get_exchange_data(exchange: str, theme: str = "dark"):
         # Get chart colors based on theme
         colors = get_chart_colors(theme)
 
-        fig = go.Figure(
+        fig = FigureBuilder(
             layout=create_base_layout(
                 x_title="Date",
                 y_title="Volume",
@@ -277,13 +307,10 @@ async def get_exchange_data(exchange: str, theme: str = "dark"):
         )
 
         # Apply the standard configuration to the figure with theme
-        fig = apply_config_to_figure(fig, theme=theme)
+        fig.apply_config(theme)
 
         # Convert figure to JSON with the config
-        figure_json = fig.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(fig.to_dict())
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -332,30 +359,8 @@ async def get_rsi(
     theme: str = "dark"
 ):
     try:
-        data = await ccdata_service._fetch_spot_data(
-            (exchange, coin_id), 
-            interval=interval, 
-            aggregate=1, 
-            limit=2000
-        )
-        data = pd.DataFrame(data)
-        data = data[['TIMESTAMP', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']]
-        data['TIMESTAMP'] = pd.to_datetime(data['TIMESTAMP'], unit='s')
-        if interval == "minutes" or interval == "hours":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d %H:%M:%S")
-        elif interval == "day":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d")
-        data = data.set_index("TIMESTAMP")
-
-        # Calculate RSI
-        delta = data['CLOSE'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        data['RSI'] = 100 - (100 / (1 + rs))
-
-        # Calculate 3-period MA of RSI
-        data['RSI_MA3'] = data['RSI'].rolling(window=3).mean()
+        # RSI and its 3-period MA are maintained incrementally per series
+        data = await get_candle_frame(exchange, coin_id, interval, indicators=True)
 
         # Get chart colors based on theme
         colors = get_chart_colors(theme)
@@ -378,7 +383,7 @@ async def get_rsi(
             )
         )
 
-        fig = go.Figure(layout=layout)
+        fig = FigureBuilder(layout)
         
         # Add shaded areas for overbought/oversold zones
         fig.add_hrect(
@@ -393,33 +398,30 @@ async def get_rsi(
         )
 
         # Add RSI line in purple
-        fig.add_trace(go.Scatter(
+        fig.add_scatter(
             x=data.index,
             y=data['RSI'],
             name="RSI",
             line=dict(color=colors['main_line'])
-        ))
+        )
 
         # Add RSI MA line in yellow
-        fig.add_trace(go.Scatter(
+        fig.add_scatter(
             x=data.index,
             y=data['RSI_MA3'],
             name="RSI (3 MA)",
             line=dict(color=colors['secondary'], dash='dot')
-        ))
+        )
 
         # Add reference lines
         fig.add_hline(y=70, line_dash="dash", line_color="red", opacity=0.5)
         fig.add_hline(y=30, line_dash="dash", line_color="green", opacity=0.5)
 
         # Apply the standard configuration to the figure with theme
-        fig = apply_config_to_figure(fig, theme=theme)
+        fig.apply_config(theme)
 
         # Convert figure to JSON with the config
-        figure_json = fig.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(fig.to_dict())
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -469,27 +471,8 @@ async def get_macd(
     theme: str = "dark"
 ):
     try:
-        data = await ccdata_service._fetch_spot_data(
-            (exchange, coin_id), 
-            interval=interval, 
-            aggregate=1, 
-            limit=2000
-        )
-        data = pd.DataFrame(data)
-        data = data[['TIMESTAMP', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']]
-        data['TIMESTAMP'] = pd.to_datetime(data['TIMESTAMP'], unit='s')
-        if interval == "minutes" or interval == "hours":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d %H:%M:%S")
-        elif interval == "day":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d")
-        data = data.set_index("TIMESTAMP")
-
-        # Calculate MACD components
-        exp1 = data['CLOSE'].ewm(span=12, adjust=False).mean()
-        exp2 = data['CLOSE'].ewm(span=26, adjust=False).mean()
-        data['MACD'] = exp1 - exp2
-        data['Signal'] = data['MACD'].ewm(span=9, adjust=False).mean()
-        data['Histogram'] = data['MACD'] - data['Signal']
+        # MACD (12/26/9) components are maintained incrementally per series
+        data = await get_candle_frame(exchange, coin_id, interval, indicators=True)
 
         # Get quantiles for shading
         upper_threshold = data['MACD'].quantile(0.85)
@@ -511,7 +494,7 @@ async def get_macd(
             )
         )
 
-        fig = go.Figure(layout=layout)
+        fig = FigureBuilder(layout)
 
         # Add shaded areas for extreme values
         fig.add_hrect(
@@ -532,23 +515,23 @@ async def get_macd(
         )
 
         # Add MACD line
-        fig.add_trace(go.Scatter(
+        fig.add_scatter(
             x=data.index,
             y=data['MACD'],
             name="MACD",
             line=dict(color=colors['main_line'])
-        ))
+        )
 
         # Add Signal line
-        fig.add_trace(go.Scatter(
+        fig.add_scatter(
             x=data.index,
             y=data['Signal'],
             name="Signal",
             line=dict(color=colors['secondary'])
-        ))
+        )
 
         # Add Histogram as a bar chart
-        fig.add_trace(go.Bar(
+        fig.add_bar(
             x=data.index,
             y=data['Histogram'],
             name="Histogram",
@@ -557,7 +540,7 @@ async def get_macd(
                     lambda x: colors['positive'] if x > 0 else colors['negative']
                 )
             )
-        ))
+        )
 
         # Add reference lines for thresholds
         fig.add_hline(
@@ -575,13 +558,10 @@ async def get_macd(
         fig.add_hline(y=0, line_dash="solid", line_color="gray", opacity=0.5)
 
         # Apply the standard configuration to the figure with theme
-        fig = apply_config_to_figure(fig, theme=theme)
+        fig.apply_config(theme)
 
         # Convert figure to JSON with the config
-        figure_json = fig.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(fig.to_dict())
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -631,21 +611,7 @@ async def get_fibonacci(
     theme: str = "dark"
 ):
     try:
-        data = await ccdata_service._fetch_spot_data(
-            (exchange, coin_id), 
-            interval=interval, 
-            aggregate=1, 
-            limit=2000
-        )
-        data = pd.DataFrame(data)
-        data = data[['TIMESTAMP', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']]
-        data['TIMESTAMP'] = pd.to_datetime(data['TIMESTAMP'], unit='s')
-
-        if interval == "minutes" or interval == "hours":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d %H:%M:%S")
-        elif interval == "day":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d")
-        data = data.set_index("TIMESTAMP")
+        data = await get_candle_frame(exchange, coin_id, interval)
 
         reverse = False
 
@@ -738,10 +704,7 @@ async def get_fibonacci(
         fig = apply_config_to_figure(fig, theme=theme)
         
         # Convert figure to JSON with the config
-        figure_json = fig.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(fig)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -790,46 +753,12 @@ async def get_stochastic(
     theme: str = "dark"
 ):
     try:
-        data = await ccdata_service._fetch_spot_data(
-            (exchange, coin_id), 
-            interval=interval, 
-            aggregate=1, 
-            limit=2000
-        )
-        data = pd.DataFrame(data)
-        data = data[['TIMESTAMP', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']]
-        data['TIMESTAMP'] = pd.to_datetime(data['TIMESTAMP'], unit='s')
-        if interval == "minutes" or interval == "hours":
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime(
-                "%Y-%m-%d %H:%M:%S")
-        elif interval == "days":  # Fixed "day" to "days" to match param value
-            data['TIMESTAMP'] = data['TIMESTAMP'].dt.strftime("%Y-%m-%d")
-        data = data.set_index("TIMESTAMP")
-
-        # Calculate Stochastic Oscillator
+        # %K (14) and %D (3) are maintained incrementally per series
+        data = await get_candle_frame(exchange, coin_id, interval, indicators=True)
+
         period = 14
-        # Handle potential NaN values in data
-        data_clean = data.dropna()
-        
-        if len(data_clean) < period:
+        if len(data) < period:
             raise ValueError(f"Not enough data points for {period}-period calculation")
-            
-        low_min = data_clean['LOW'].rolling(window=period).min()
-        high_max = data_clean['HIGH'].rolling(window=period).max()
-        
-        # Avoid division by zero
-        denominator = high_max - low_min
-        # Replace zeros with small value to avoid division by zero
-        denominator = denominator.replace(0, 1e-10)
-        
-        # Calculate %K
-        data_clean['%K'] = 100 * ((data_clean['CLOSE'] - low_min) / denominator)
-        
-        # Calculate %D (3-period MA of %K)
-        data_clean['%D'] = data_clean['%K'].rolling(window=3).mean()
-        
-        # Use the cleaned data for the chart
-        data = data_clean
 
         # Get chart colors based on theme
         colors = get_chart_colors(theme)
@@ -852,7 +781,7 @@ async def get_stochastic(
             )
         )
 
-        fig = go.Figure(layout=layout)
+        fig = FigureBuilder(layout)
         
         # Add shaded areas for overbought/oversold zones
         fig.add_hrect(
@@ -867,34 +796,355 @@ async def get_stochastic(
         )
 
         # Add %K line
-        fig.add_trace(go.Scatter(
+        fig.add_scatter(
             x=data.index,
             y=data['%K'],
             name="%K",
             line=dict(color=colors['main_line'])
-        ))
+        )
 
         # Add %D line
-        fig.add_trace(go.Scatter(
+        fig.add_scatter(
             x=data.index,
             y=data['%D'],
             name="%D",
             line=dict(color=colors['secondary'], dash='dot')
-        ))
+        )
 
         # Add reference lines
         fig.add_hline(y=80, line_dash="dash", line_color="red", opacity=0.5)
         fig.add_hline(y=20, line_dash="dash", line_color="green", opacity=0.5)
 
         # Apply the standard configuration to the figure with theme
-        fig = apply_config_to_figure(fig, theme=theme)
+        fig.apply_config(theme)
 
         # Convert figure to JSON with the config
-        figure_json = fig.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(fig.to_dict())
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@ccdata_router.get("/indicators")
+@register_widget({
+    "name": "CCData Indicators",
+    "description": (
+        "Several technical indicators computed from one load of candles. "
+        "Indicators are given as a list such as rsi:14,macd:12/26/9,stoch:14/3,"
+        "sma:50,ema:20,bbands:20/2"
+    ),
+    "category": "technical",
+    "type": "chart",
+    "endpoint": "ccdata/indicators",
+    "widgetId": "ccdata/indicators",
+    "gridData": {"w": 28, "h": 16},
+    "source": "CCData",
+    "params": [
+        {
+            "paramName": "exchange",
+            "value": "binance",
+            "label": "Exchange",
+            "type": "text",
+            "description": "Exchange to fetch data from",
+            "options": EXCHANGE_LIST
+        },
+        {
+            "paramName": "coin_id",
+            "value": "BTC-USDT",
+            "label": "Symbol",
+            "show": True,
+            "description": "Trading pair",
+        },
+        {
+            "paramName": "interval",
+            "value": "days",
+            "label": "Interval",
+            "type": "text",
+            "show": True,
+            "description": "Interval to fetch data for",
+            "options": [{"label": "Minutes", "value": "minutes"}, {"label": "Hours", "value": "hours"}, {"label": "Days", "value": "days"}]
+        },
+        {
+            "paramName": "indicators",
+            "value": "rsi:14,macd:12/26/9,stoch:14/3,sma:50,bbands:20/2",
+            "label": "Indicators",
+            "show": True,
+            "description": "Comma separated indicators with their parameters",
+        },
+    ],
+    "data": {"chart": {"type": "line"}},
+})
+async def get_indicators(
+    exchange: str,
+    coin_id: str,
+    interval: str = "days",
+    indicators: str = "rsi:14,macd:12/26/9,stoch:14/3,sma:50,bbands:20/2",
+    output_format: str = Query("chart", alias="format"),
+    theme: str = "dark"
+):
+    """
+    Returns the requested indicators of an instrument, either as a chart with
+    one panel per oscillator or, with format=json, as columnar data.
+    """
+    try:
+        specs = parse_indicator_specs(indicators)
+        if output_format not in ("chart", "json"):
+            raise ValueError("format must be 'chart' or 'json'")
+
+        data = await ccdata_service.get_candles(exchange, coin_id, interval)
+        if data.empty:
+            raise ValueError(f"No candles found for {coin_id} on {exchange}")
+
+        high, low, close = data[['HIGH', 'LOW', 'CLOSE']].to_numpy(dtype=float).T
+        results = compute_indicator_set(high, low, close, specs)
+        timestamps = format_timestamps(data['TIMESTAMP'], interval).tolist()
+
+        if output_format == "json":
+            return {
+                "exchange": exchange,
+                "instrument": coin_id,
+                "interval": interval,
+                "timestamp": timestamps,
+                **{
+                    column.lower(): to_json_list(data[column].to_numpy())
+                    for column in ['OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']
+                },
+                "indicators": {label: to_json_list(values) for label, values in results.items()},
+            }
+
+        colors = get_chart_colors(theme)
+        line_colors = [colors['secondary'], colors['tertiary'], colors['neutral'], colors['quaternary']]
+        panels = list(dict.fromkeys(
+            (name, params) for name, params in specs if name not in OVERLAY_INDICATORS
+        ))
+
+        # Panels are stacked y-axes sharing one x-axis, price on top with half
+        # the height and the oscillators splitting the rest
+        spacing = 0.03
+        heights = [0.5] + [0.5 / len(panels)] * len(panels) if panels else [1.0]
+        scale = 1 - spacing * (len(heights) - 1)
+        layout = create_base_layout(
+            x_title="Date",
+            y_title="Price",
+            y_dtype="$,.2f",
+            theme=theme
+        )
+        top = 1.0
+        for row, height in enumerate(heights, start=1):
+            axis = layout.setdefault("yaxis" if row == 1 else f"yaxis{row}", {})
+            axis.update(domain=[max(top - height * scale, 0.0), top], anchor="x")
+            top -= height * scale + spacing
+        layout["xaxis"].update(anchor=f"y{len(heights)}" if panels else "y", rangeslider=dict(visible=False))
+
+        fig = FigureBuilder(layout)
+
+        fig.add_candlestick(
+            x=timestamps,
+            open=data['OPEN'],
+            high=data['HIGH'],
+            low=data['LOW'],
+            close=data['CLOSE'],
+            name="Price",
+            increasing_line_color=colors['positive'],
+            decreasing_line_color=colors['negative']
+        )
+
+        overlay = 0
+        for name, params in dict.fromkeys(specs):
+            if name not in OVERLAY_INDICATORS:
+                continue
+            label = indicator_label(name, params)
+            color = line_colors[overlay % len(line_colors)]
+            overlay += 1
+            if name == "bbands":
+                for band in ("upper", "middle", "lower"):
+                    fig.add_scatter(
+                        x=timestamps,
+                        y=results[f"{label}_{band}"],
+                        name=f"{label} {band}",
+                        line=dict(color=color, width=1, dash=None if band == "middle" else "dot")
+                    )
+            else:
+                fig.add_scatter(
+                    x=timestamps,
+                    y=results[label],
+                    name=label,
+                    line=dict(color=color, width=1)
+                )
+
+        for row, (name, params) in enumerate(panels, start=2):
+            label = indicator_label(name, params)
+            yaxis = f"y{row}"
+            if name == "rsi":
+                fig.add_scatter(
+                    x=timestamps, y=results[label], name=label, yaxis=yaxis,
+                    line=dict(color=colors['main_line'])
+                )
+                fig.add_hline(y=70, yref=yaxis, line_dash="dash", line_color="red", opacity=0.5)
+                fig.add_hline(y=30, yref=yaxis, line_dash="dash", line_color="green", opacity=0.5)
+                fig.update_layout(**{f"yaxis{row}_range": [0, 100]})
+            elif name == "stoch":
+                fig.add_scatter(
+                    x=timestamps, y=results[f"{label}_k"], name=f"{label} %K", yaxis=yaxis,
+                    line=dict(color=colors['main_line'])
+                )
+                fig.add_scatter(
+                    x=timestamps, y=results[f"{label}_d"], name=f"{label} %D", yaxis=yaxis,
+                    line=dict(color=colors['secondary'], dash='dot')
+                )
+                fig.add_hline(y=80, yref=yaxis, line_dash="dash", line_color="red", opacity=0.5)
+                fig.add_hline(y=20, yref=yaxis, line_dash="dash", line_color="green", opacity=0.5)
+                fig.update_layout(**{f"yaxis{row}_range": [0, 100]})
+            elif name == "macd":
+                histogram = results[f"{label}_hist"]
+                fig.add_bar(
+                    x=timestamps, y=histogram, name=f"{label} histogram", yaxis=yaxis,
+                    marker=dict(color=np.where(histogram > 0, colors['positive'], colors['negative']))
+                )
+                fig.add_scatter(
+                    x=timestamps, y=results[f"{label}_line"], name=label, yaxis=yaxis,
+                    line=dict(color=colors['main_line'])
+                )
+                fig.add_scatter(
+                    x=timestamps, y=results[f"{label}_signal"], name=f"{label} signal", yaxis=yaxis,
+                    line=dict(color=colors['secondary'])
+                )
+            fig.update_layout(**{f"yaxis{row}_title": label.split("_")[0].upper()})
+
+        # Apply the standard configuration to the figure with theme
+        fig.apply_config(theme=theme)
+
+        # Convert figure to JSON with the config
+        return FigureResponse(fig.to_dict())
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@ccdata_router.get("/indicator-scanner")
+@register_widget({
+    "name": "Indicator Scanner",
+    "description": (
+        "Latest RSI, MACD and stochastic of every active pair on an exchange, "
+        "optionally filtered by indicator conditions"
+    ),
+    "category": "technical",
+    "type": "table",
+    "endpoint": "ccdata/indicator-scanner",
+    "widgetId": "ccdata/indicator-scanner",
+    "gridData": {"w": 28, "h": 14},
+    "source": "CCData",
+    "params": [
+        {
+            "paramName": "exchange",
+            "value": "binance",
+            "label": "Exchange",
+            "type": "text",
+            "description": "Exchange to scan",
+            "options": EXCHANGE_LIST
+        },
+        {
+            "paramName": "quote",
+            "value": "USDT",
+            "label": "Quote",
+            "show": True,
+            "description": "Quote currency of the pairs to scan",
+        },
+        {
+            "paramName": "interval",
+            "value": "hours",
+            "label": "Interval",
+            "type": "text",
+            "show": True,
+            "description": "Candle interval",
+            "options": [{"label": "Minutes", "value": "minutes"}, {"label": "Hours", "value": "hours"}, {"label": "Days", "value": "days"}]
+        },
+        {
+            "paramName": "rsi_below",
+            "value": None,
+            "label": "RSI Below",
+            "show": True,
+            "description": "Only pairs with an RSI below this value",
+        },
+        {
+            "paramName": "rsi_above",
+            "value": None,
+            "label": "RSI Above",
+            "show": False,
+            "description": "Only pairs with an RSI above this value",
+        },
+        {
+            "paramName": "stoch_below",
+            "value": None,
+            "label": "%K Below",
+            "show": False,
+            "description": "Only pairs with a stochastic %K below this value",
+        },
+        {
+            "paramName": "stoch_above",
+            "value": None,
+            "label": "%K Above",
+            "show": False,
+            "description": "Only pairs with a stochastic %K above this value",
+        },
+        {
+            "paramName": "macd",
+            "value": "any",
+            "label": "MACD",
+            "type": "text",
+            "show": False,
+            "description": "Only pairs whose MACD is above (bullish) or below (bearish) its signal",
+            "options": [{"label": "Any", "value": "any"}, {"label": "Bullish", "value": "bullish"}, {"label": "Bearish", "value": "bearish"}]
+        },
+    ],
+    "data": {
+        "table": {
+            "showAll": True,
+            "columnsDefs": [
+                {"headerName": "Instrument", "field": "instrument", "chartDataType": "category"},
+                {"headerName": "Close", "field": "close", "chartDataType": "series"},
+                {"headerName": "Change", "field": "change", "chartDataType": "series"},
+                {"headerName": "RSI", "field": "rsi", "chartDataType": "series"},
+                {"headerName": "MACD", "field": "macd", "chartDataType": "series"},
+                {"headerName": "Signal", "field": "macd_signal", "chartDataType": "series"},
+                {"headerName": "Histogram", "field": "macd_hist", "chartDataType": "series"},
+                {"headerName": "%K", "field": "stoch_k", "chartDataType": "series"},
+                {"headerName": "%D", "field": "stoch_d", "chartDataType": "series"},
+            ],
+        }
+    },
+})
+async def get_indicator_scanner(
+    response: Response,
+    exchange: str = "binance",
+    quote: str = "USDT",
+    interval: str = "hours",
+    rsi_below: float = None,
+    rsi_above: float = None,
+    stoch_below: float = None,
+    stoch_above: float = None,
+    macd: str = "any"
+):
+    try:
+        data, failed = await ccdata_service.scan_indicators(exchange, quote, interval)
+        # Instruments whose candles could not be loaded are left out of the table
+        response.headers["X-Scan-Failed"] = str(len(failed))
+
+        mask = pd.Series(True, index=data.index)
+        if rsi_below is not None:
+            mask &= data['rsi'] < rsi_below
+        if rsi_above is not None:
+            mask &= data['rsi'] > rsi_above
+        if stoch_below is not None:
+            mask &= data['stoch_k'] < stoch_below
+        if stoch_above is not None:
+            mask &= data['stoch_k'] > stoch_above
+        if macd == "bullish":
+            mask &= data['macd_hist'] > 0
+        elif macd == "bearish":
+            mask &= data['macd_hist'] < 0
+
+        data = data[mask].sort_values('rsi')
+        data = data.astype(object).where(data.notna(), None)
+        return data.to_dict(orient="records")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
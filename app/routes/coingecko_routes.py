@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.coingecko_service import CoinGeckoService
 from app.core.plotly_config import (
     apply_config_to_figure, 
@@ -6,9 +6,10 @@ from app.core.plotly_config import (
     create_base_layout
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
+from app.core.downsample import MIN_POINTS, downsample_lines
 import plotly.graph_objects as go
 import pandas as pd
-import json
 
 
 coingecko_router = APIRouter()
@@ -27,6 +28,15 @@ coingecko_service = CoinGeckoService()
     "endpoint": "coingecko/coin-list",
     "gridData": {"w": 20, "h": 9},
     "source": "CoinGecko",
+    "params": [
+        {
+            "paramName": "q",
+            "value": "",
+            "label": "Search",
+            "show": True,
+            "description": "Filter coins by ID, ticker or name",
+        },
+    ],
     "data": {
         "table": {
             "showAll": True,
@@ -57,10 +67,15 @@ coingecko_service = CoinGeckoService()
 })
 async def get_coin_list(
     include_platform: str = "true", 
-    status: str = "active"
+    status: str = "active",
+    q: str = None,
+    limit: int = None,
+    offset: int = 0
 ):
-    symbols_list = await coingecko_service.get_coin_list(include_platform, status)
-    return symbols_list.to_dict(orient="records")
+    if (limit is not None and limit < 1) or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be positive and offset non-negative")
+    catalog = await coingecko_service.get_coin_catalog(include_platform, status)
+    return [catalog.records[row] for row in catalog.search(q, limit, offset)]
 
 
 @coingecko_router.get("/price")
@@ -82,17 +97,25 @@ async def get_coin_list(
             "optionsEndpoint": "coingecko/coin-list-formatted",
             "description": "CoinGecko ID of the cryptocurrency",
             "style": {"popupWidth": 600},
+        },
+        {
+            "paramName": "max_points",
+            "value": 1500,
+            "label": "Max Points",
+            "show": False,
+            "description": "Maximum number of points drawn, longer histories are downsampled",
         }
     ],
     "data": {"chart": {"type": "line"}},
 })
 
 @coingecko_router.get("/price")
-async def get_market_data(coin_id: str, theme: str = "dark"):
+async def get_market_data(coin_id: str, theme: str = "dark", max_points: int = Query(None, ge=MIN_POINTS)):
     try:
         coin_id = coin_id.lower()
         # Get price data directly from the service
         data = await coingecko_service.get_market_data(coin_id)
+        data = downsample_lines(data, max_points, [f"{coin_id}_price"], x="date")
         data["date"] = pd.to_datetime(data["date"]).dt.strftime("%Y-%m-%d")
         data = data.set_index("date")
 
@@ -120,10 +143,7 @@ async def get_market_data(coin_id: str, theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -147,15 +167,23 @@ async def get_market_data(coin_id: str, theme: str = "dark"):
             "optionsEndpoint": "coingecko/coin-list-formatted",
             "description": "CoinGecko ID of the cryptocurrency",
             "style": {"popupWidth": 600},
+        },
+        {
+            "paramName": "max_points",
+            "value": 1500,
+            "label": "Max Points",
+            "show": False,
+            "description": "Maximum number of points drawn, longer histories are downsampled",
         }
     ],
     "data": {"chart": {"type": "line"}},
 })
-async def get_dominance(coin_id: str, theme: str = "dark"):
+async def get_dominance(coin_id: str, theme: str = "dark", max_points: int = Query(None, ge=MIN_POINTS)):
     try:
         coin_id = coin_id.lower()
         # Get dominance data directly from the service
         data = await coingecko_service.get_dominance(coin_id)
+        data = downsample_lines(data, max_points, ["dominance"], x="date")
         data["date"] = pd.to_datetime(data["date"]).dt.strftime("%Y-%m-%d")
         data = data.set_index("date")
 
@@ -200,10 +228,7 @@ async def get_dominance(coin_id: str, theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -276,10 +301,7 @@ async def get_vm_ratio(coin_id: str, theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -465,10 +487,7 @@ async def get_correlation(
         figure = apply_config_to_figure(figure, theme=theme)
         
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -579,10 +598,7 @@ async def get_btc_price_sma_multiplier(theme: str = "dark"):
         fig= apply_config_to_figure(fig, theme=theme)
 
         # Convert figure to JSON with the config
-        fig_json = fig.to_json()
-        fig_dict = json.loads(fig_json)
-        
-        return fig_dict
+        return FigureResponse(fig)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
     
@@ -590,7 +606,10 @@ async def get_btc_price_sma_multiplier(theme: str = "dark"):
 @coingecko_router.get("/coin-list-formatted")
 async def get_coin_list_formatted(
     include_platform: str = "true", 
-    status: str = "active"
+    status: str = "active",
+    q: str = None,
+    limit: int = None,
+    offset: int = 0
 ):
     """
     Returns a formatted list of coins in the format:
@@ -598,21 +617,12 @@ async def get_coin_list_formatted(
         "value": "bitcoin",
         "label": "Bitcoin (BTC)"
     }
+    Coins matching q come first, best match first.
     """
-    symbols_list = await coingecko_service.get_coin_list(include_platform, status)
-    
-    # Convert to the requested format
-    formatted_list = []
-    for coin in symbols_list.to_dict(orient="records"):
-        formatted_list.append({
-            "value": coin["id"],
-            "label": f"{coin['name']} ({coin['symbol'].upper()})",
-            "extraInfo": {
-                "description": coin['name']
-            }
-        })
-    
-    return formatted_list
+    if (limit is not None and limit < 1) or offset < 0:
+        raise HTTPException(status_code=400, detail="limit must be positive and offset non-negative")
+    catalog = await coingecko_service.get_coin_catalog(include_platform, status)
+    return [catalog.options[row] for row in catalog.search(q, limit, offset)]
 
 @coingecko_router.get("/watchlist")
 @register_widget({
@@ -671,9 +681,10 @@ async def get_agents_market_caps(theme: str = "dark"):
         virtuals_agents = virtuals_agents[virtuals_agents["id"] != "virtual-protocol"]
         virtuals_agents_ids = virtuals_agents["id"].tolist()
 
-        df = await coingecko_service.get_market_data(virtuals_agents_ids)
+        df, failed = await coingecko_service.get_market_histories(virtuals_agents_ids)
+        if df.empty and failed:
+            raise Exception(f"Failed to fetch market data for all {len(failed)} agents")
         df.fillna(0, inplace=True)
-        df = df[df["date"].dt.time == pd.to_datetime("00:00:00").time()]
         df = df[["date", "market_cap", "coingecko_id"]]
         df.rename(columns={"market_cap": "market_cap_usd"}, inplace=True)
 
@@ -704,11 +715,8 @@ async def get_agents_market_caps(theme: str = "dark"):
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        # Agents whose history could not be loaded are left out of the chart
+        return FigureResponse(figure, headers={"X-Failed-Coins": ",".join(failed)})
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
@@ -6,9 +6,9 @@ from app.core.plotly_config import (
     create_base_layout
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
 import plotly.graph_objects as go
 import pandas as pd
-import json
 
 geckoterminal_router = APIRouter()
 geckoterminal_service = GeckoTerminalService()
@@ -334,10 +334,7 @@ async def get_geckoterminal_candles(
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
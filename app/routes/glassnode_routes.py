@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.glassnode_service import GlassnodeService
 from app.core.plotly_config import (
     apply_config_to_figure, 
@@ -6,9 +6,10 @@ from app.core.plotly_config import (
     create_base_layout
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
+from app.core.downsample import MIN_POINTS, downsample_lines
 import plotly.graph_objects as go
 import pandas as pd
-import json
 
 glassnode_router = APIRouter()
 glassnode_service = GlassnodeService()
@@ -37,15 +38,24 @@ glassnode_service = GlassnodeService()
                 {"value": "False", "label": "False"},
             ],
         },
+        {
+            "paramName": "max_points",
+            "value": 1500,
+            "label": "Max Points",
+            "show": False,
+            "description": "Maximum number of points drawn, longer histories are downsampled",
+        },
     ],
     "data": {"chart": {"type": "line"}},
 })
 async def get_lth_supply(
     show_price: str = "False", 
-    theme: str = "dark"
+    theme: str = "dark",
+    max_points: int = Query(None, ge=MIN_POINTS)
 ):
     try:
         data = await glassnode_service.get_lth_supply("btc")
+        data = downsample_lines(data, max_points, ["lth_supply"], x="date")
         data["date"] = pd.to_datetime(data["date"]).dt.strftime("%Y-%m-%d")
         data = data.set_index("date")
 
@@ -71,6 +81,7 @@ async def get_lth_supply(
 
         if show_price.lower() == "true":
             price_data = await glassnode_service.get_price(asset)
+            price_data = downsample_lines(price_data, max_points, ["price"], x="date")
             price_data["date"] = pd.to_datetime(
                 price_data["date"]
             ).dt.strftime("%Y-%m-%d")
@@ -102,10 +113,7 @@ async def get_lth_supply(
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -212,10 +220,7 @@ async def get_lth_net_change(
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -269,10 +274,7 @@ async def get_glassnode_price(asset: str = "btc", theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-    
-        return figure_dict
+        return FigureResponse(figure)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -344,10 +346,7 @@ async def get_mvrv_zscore(asset: str = "btc", theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
   
@@ -472,9 +471,6 @@ async def get_lth_nupl(theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
         
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
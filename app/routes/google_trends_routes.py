@@ -1,10 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from app.services.google_trends_service import GoogleTrendsService
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
 from app.core.plotly_config import create_base_layout, apply_config_to_figure
 import plotly.graph_objects as go
 import pandas as pd
-import json
 
 google_trends_router = APIRouter()
 google_trends_service = GoogleTrendsService()
@@ -49,6 +49,6 @@ async def get_historical_google_trends(search_term: str, theme: str = "dark"):
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.microstrategy_service import MicrostrategyService
 from app.core.plotly_config import (
     apply_config_to_figure, 
@@ -6,9 +6,10 @@ from app.core.plotly_config import (
     create_base_layout
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
+from app.core.downsample import MIN_POINTS, downsample_lines
 import plotly.graph_objects as go
 import pandas as pd
-import json
 
 
 microstrategy_router = APIRouter()
@@ -28,11 +29,21 @@ microstrategy_service = MicrostrategyService()
     "endpoint": "microstrategy/premium",
     "gridData": {"w": 20, "h": 9},
     "source": "Microstrategy",
+    "params": [
+        {
+            "paramName": "max_points",
+            "value": 1500,
+            "label": "Max Points",
+            "show": False,
+            "description": "Maximum number of points drawn, longer histories are downsampled",
+        }
+    ],
     "data": {"chart": {"type": "line"}},
 })
-async def get_microstrategy_premium(theme: str = "dark"):
+async def get_microstrategy_premium(theme: str = "dark", max_points: int = Query(None, ge=MIN_POINTS)):
     try:
         data = await microstrategy_service.get_prices()
+        data = downsample_lines(data, max_points, ["nav_premium", "btc_price"], x="date")
         data["date"] = pd.to_datetime(data["date"]).dt.strftime("%Y-%m-%d")
         data = data.set_index("date")
 
@@ -82,10 +93,7 @@ async def get_microstrategy_premium(theme: str = "dark"):
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Convert figure to JSON with the config
-        figure_json = figure.to_json()
-        figure_dict = json.loads(figure_json)
-        
-        return figure_dict
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from app.services.velo_service import VeloService
 from app.core.plotly_config import (
     get_chart_colors, 
     apply_config_to_figure,
-    create_base_layout
+    create_base_layout,
+    FigureBuilder
 )
 from app.core.registry import register_widget
+from app.core.responses import FigureResponse
+from app.core.downsample import MIN_POINTS, downsample_lines, downsample_ohlc
 import plotly.graph_objects as go
 import pandas as pd
-import json
 from datetime import datetime, timedelta
 
 velo_router = APIRouter()
@@ -25,7 +27,7 @@ velo_service = VeloService()
     "source": "VeloData",
 })
 async def get_velo_futures_products():
-    data = velo_service.get_futures_products()
+    data = await velo_service.get_futures_products()
     return data.to_dict(orient="records")
 
 @velo_router.get("/spot-products")
@@ -38,7 +40,7 @@ async def get_velo_futures_products():
     "source": "VeloData",
 })
 async def get_velo_spot_products():
-    data = velo_service.get_spot_products()
+    data = await velo_service.get_spot_products()
     return data.to_dict(orient="records")
 
 @velo_router.get("/options-products")
@@ -51,7 +53,7 @@ async def get_velo_spot_products():
     "source": "VeloData",
 })
 async def get_velo_options_products():
-    data = velo_service.get_options_products()
+    data = await velo_service.get_options_products()
     return data.to_dict(orient="records")
 
 @velo_router.get("/oi-weighted-funding-rates")
@@ -98,7 +100,7 @@ async def get_velo_oi_weighted_funding_rates(
     theme: str = "dark"
 ):
     try:
-        data = velo_service.oi_weighted_funding_rate(coin, begin, resolution)
+        data = await velo_service.oi_weighted_funding_rate(coin, begin, resolution)
         data = data.set_index("time")
         
         # Get theme-based colors
@@ -147,7 +149,7 @@ async def get_velo_oi_weighted_funding_rates(
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -185,6 +187,13 @@ async def get_velo_oi_weighted_funding_rates(
             "show": True,
             "description": "Start date for the data",
             "type": "date",
+        },
+        {
+            "paramName": "max_points",
+            "value": 1500,
+            "label": "Max Points",
+            "show": False,
+            "description": "Maximum number of points drawn, longer histories are downsampled",
         }
     ],
     "data": {"chart": {"type": "line"}},
@@ -193,11 +202,12 @@ async def get_velo_funding_rates(
     coin: str = "BTC", 
     begin: str = None, 
     resolution: str = "1d", 
-    theme: str = "dark"
+    theme: str = "dark",
+    max_points: int = Query(None, ge=MIN_POINTS)
 ):
     try:
         # Get data from velo service
-        data = velo_service.funding_rates(coin, begin, resolution)
+        data = await velo_service.funding_rates(coin, begin, resolution)
         data['time'] = pd.to_datetime(data['time'])
         
         # Define colors for exchanges
@@ -216,8 +226,15 @@ async def get_velo_funding_rates(
             theme=theme
         ))
 
+        # The point budget is shared by the exchange traces
+        if max_points:
+            max_points = max(max_points // max(data['exchange'].nunique(), 1), MIN_POINTS)
+
         # Group by exchange and add a trace for each
         for exchange, group_data in data.groupby('exchange'):
+            group_data = downsample_lines(
+                group_data, max_points, ['annualized_funding_rate'], x='time'
+            )
             figure.add_trace(
                 go.Scatter(
                     x=group_data['time'],
@@ -232,7 +249,7 @@ async def get_velo_funding_rates(
         figure = apply_config_to_figure(figure, theme=theme)
 
         # Return the chart as JSON
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing funding rates: {str(e)}")
@@ -281,7 +298,7 @@ async def get_velo_long_liquidations(
     theme: str = "dark"
 ):
     try:
-        data = velo_service.liquidations(coin, begin, resolution)
+        data = await velo_service.liquidations(coin, begin, resolution)
         data = data.groupby('time').agg({
             'close_price': 'mean',
             'buy_liquidations_dollar_volume': 'sum'
@@ -331,7 +348,7 @@ async def get_velo_long_liquidations(
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -380,7 +397,7 @@ async def get_velo_short_liquidations(
     theme: str = "dark"
 ):
     try:
-        data = velo_service.liquidations(coin, begin, resolution)
+        data = await velo_service.liquidations(coin, begin, resolution)
         data = data.rename(columns={"time": "date"})
         data = data.set_index("date")
         
@@ -425,7 +442,7 @@ async def get_velo_short_liquidations(
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -473,7 +490,7 @@ async def get_velo_net_liquidations(
     theme: str = "dark"
 ):
     try:
-        data = velo_service.liquidations(coin, begin, resolution)
+        data = await velo_service.liquidations(coin, begin, resolution)
         
         data = data.groupby('time').agg({
             'close_price': 'mean',
@@ -533,7 +550,7 @@ async def get_velo_net_liquidations(
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -576,7 +593,7 @@ async def get_velo_net_liquidations(
 })
 async def get_velo_open_interest(coin: str = "BTC", begin: str = None, resolution: str = "1d", theme: str = "dark"):
     try:
-        data = velo_service.open_interest(coin, begin, resolution)
+        data = await velo_service.open_interest(coin, begin, resolution)
         
         oi_data = data.groupby(['time', 'exchange'])['dollar_open_interest_close'].sum().reset_index()
         price_data = data.groupby('time')['close_price'].mean().reset_index()
@@ -639,7 +656,7 @@ async def get_velo_open_interest(coin: str = "BTC", begin: str = None, resolutio
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -676,6 +693,13 @@ async def get_velo_open_interest(coin: str = "BTC", begin: str = None, resolutio
             "show": True,
             "description": "Start date for the data",
             "type": "date",
+        },
+        {
+            "paramName": "max_points",
+            "value": 1500,
+            "label": "Max Points",
+            "show": False,
+            "description": "Maximum number of points drawn, longer histories are merged into wider candles",
         }
     ],
     "data": {"chart": {"type": "candlestick"}},
@@ -684,60 +708,61 @@ async def get_velo_ohlcv(
     ticker: str = "BTCUSDT", 
     exchange: str = "binance", 
     resolution: str = "1d",
-    theme: str = "dark"
+    theme: str = "dark",
+    max_points: int = Query(None, ge=MIN_POINTS)
 ):
     try:
         # Get data from velo service
-        data = velo_service.get_ohlcv(ticker, exchange, resolution)
+        data = await velo_service.get_ohlcv(ticker, exchange, resolution)
         
         if data.empty:
             raise HTTPException(status_code=404, detail="No data found for the specified parameters")
-        
-        # Convert to Plotly format instead of Highcharts
-        figure = go.Figure()
-        
-        # Add candlestick trace
-        figure.add_trace(
-            go.Candlestick(
-                x=data['time'],
-                open=data['open_price'],
-                high=data['high_price'],
-                low=data['low_price'],
-                close=data['close_price'],
-                name=ticker,
-                increasing_line_color='#00B140',  # Green for increasing candles
-                decreasing_line_color='#F4284D',  # Red for decreasing candles
-            )
-        )
-        
-        # Add volume as a bar chart at the bottom with a separate y-axis
-        figure.add_trace(
-            go.Bar(
-                x=data['time'],
-                y=data['coin_volume'],
-                name='Volume',
-                marker_color='rgba(128, 128, 128, 0.5)',
-                yaxis='y2',
-                hovertemplate='Volume: %{y:,.0f}<extra></extra>'
-            )
+
+        data = downsample_ohlc(
+            data,
+            max_points,
+            open='open_price',
+            high='high_price',
+            low='low_price',
+            close='close_price',
+            sum_columns=['coin_volume']
         )
         
         # Set up the layout with theme-based styling
         dark_theme = theme == 'dark'
-        bg_color = '#121212' if dark_theme else '#FFFFFF'
-        text_color = '#FFFFFF' if dark_theme else '#333333'
         grid_color = 'rgba(255,255,255,0.1)' if dark_theme else 'rgba(0,0,0,0.1)'
         
         # Create base layout
-        layout = create_base_layout(
+        figure = FigureBuilder(layout=create_base_layout(
             x_title="Date",
             y_title="Price",
             theme=theme
+        ))
+        
+        # Add candlestick trace
+        figure.add_candlestick(
+            x=data['time'],
+            open=data['open_price'],
+            high=data['high_price'],
+            low=data['low_price'],
+            close=data['close_price'],
+            name=ticker,
+            increasing_line_color='#00B140',  # Green for increasing candles
+            decreasing_line_color='#F4284D',  # Red for decreasing candles
+        )
+        
+        # Add volume as a bar chart at the bottom with a separate y-axis
+        figure.add_bar(
+            x=data['time'],
+            y=data['coin_volume'],
+            name='Volume',
+            marker_color='rgba(128, 128, 128, 0.5)',
+            yaxis='y2',
+            hovertemplate='Volume: %{y:,.0f}<extra></extra>'
         )
         
         # Update layout for candlestick chart
         figure.update_layout(
-            layout,
             title=f"{ticker} on {exchange.capitalize()}",
             xaxis_rangeslider_visible=False,  # Hide the range slider
             yaxis=dict(
@@ -765,9 +790,9 @@ async def get_velo_ohlcv(
         )
         
         # Apply the standard configuration to the figure with theme
-        figure = apply_config_to_figure(figure, theme=theme)
+        figure.apply_config(theme)
         
-        return json.loads(figure.to_json())
+        return FigureResponse(figure.to_dict())
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -811,7 +836,7 @@ async def get_velo_ohlcv(
 })
 async def get_velo_basis(coin: str = "BTC", begin: str = None, resolution: str = "1d", theme: str = "dark"):
     try:
-        data = velo_service.basis(coin.upper(), begin, resolution)
+        data = await velo_service.basis(coin.upper(), begin, resolution)
         data = data.groupby('time', as_index=False)['3m_basis_ann'].mean()
         data = data.set_index("time")
         
@@ -838,7 +863,7 @@ async def get_velo_basis(coin: str = "BTC", begin: str = None, resolution: str =
         # Apply the standard configuration to the figure with theme
         figure = apply_config_to_figure(figure, theme=theme)
 
-        return json.loads(figure.to_json())
+        return FigureResponse(figure)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -4,15 +4,26 @@ from typing import Dict
 import pandas as pd
 import aiohttp
 from app.core.session_manager import SessionManager
+from app.core.cache import get_response_cache
+from app.core.rate_limiter import get_governor
 
 class AaveService:
     def __init__(self):
         self.session_manager = SessionManager()
+        self.cache = get_response_cache()
+        self.governor = get_governor("aave")
 
     async def fetch_data(self, url: str) -> Dict:
-        session = await self.session_manager.get_session()
-        async with session.get(url) as response:
-            return await response.json()
+        return await self.cache.fetch("aave", url, None, lambda: self._request(url))
+
+    async def _request(self, url: str) -> Dict:
+        session = await self.session_manager.get_session(provider="aave")
+        status, data = await self.governor.get_json(session, url)
+
+        if status == 200:
+            return data
+
+        raise Exception(f"Failed to fetch data from Aave API. Status: {status}, Response: {data}")
 
     async def get_lending_pool_history(
         self,
@@ -2,35 +2,269 @@ import aiohttp
 import pandas as pd
 import numpy as np
 import asyncio
-from typing import List, Dict, Tuple
+import time
+from collections import OrderedDict
+from typing import Callable, List, Dict, Tuple
 from app.core.settings import get_settings
 from app.core.session_manager import SessionManager
+from app.core.cache import get_response_cache
+from app.core.rate_limiter import get_governor
+from app.core.history_store import HistoryStore, get_history_store
+from app.core.http_cache import record_dependency, record_untracked
+from app.core.indicators import StreamingIndicators, macd_array, rsi_array, stochastic_array
 
 settings = get_settings()
 
+def compute_vwap_deltas(candles: pd.DataFrame, exchanges: List[str] = None) -> pd.DataFrame:
+    """
+    Computes per-exchange VWAPs, their cross-exchange mean and the deltas to
+    that mean in one pass.
+
+    The candles are laid out as a time x exchange x pair array. Missing bars
+    and bars without volume are left out of the VWAP of their exchange, and
+    exchanges without a VWAP at a time are left out of the mean.
+
+    Args:
+        candles (pd.DataFrame): Long table with timestamp (unix seconds),
+            exchange, pair, price and volume columns.
+        exchanges (List[str]): Optional. Exchange column order of the result.
+
+    Returns:
+        pd.DataFrame: timestamp, one <exchange>_delta column per exchange and
+            average_price.
+    """
+    times, time_idx = np.unique(candles['timestamp'].to_numpy(), return_inverse=True)
+    exchange_idx, exchange_names = pd.factorize(candles['exchange'])
+    pair_idx, pair_names = pd.factorize(candles['pair'])
+
+    shape = (len(times), len(exchange_names), len(pair_names))
+    prices = np.full(shape, np.nan)
+    volumes = np.full(shape, np.nan)
+    prices[time_idx, exchange_idx, pair_idx] = candles['price'].to_numpy(dtype=float)
+    volumes[time_idx, exchange_idx, pair_idx] = candles['volume'].to_numpy(dtype=float)
+
+    valid = ~np.isnan(prices) & ~np.isnan(volumes)
+    weighted = np.where(valid, prices * volumes, 0.0).sum(axis=2)
+    total_volume = np.where(valid, volumes, 0.0).sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        vwap = np.where(total_volume > 0, weighted / total_volume, np.nan)
+
+        counts = (~np.isnan(vwap)).sum(axis=1)
+        average = np.where(counts > 0, np.nansum(vwap, axis=1) / counts, np.nan)
+        deltas = (vwap - average[:, None]) / average[:, None]
+
+    order = [
+        exchange_names.get_loc(exchange)
+        for exchange in (exchanges or exchange_names)
+        if exchange in exchange_names
+    ]
+    result = pd.DataFrame(
+        deltas[:, order],
+        columns=[f'{exchange_names[i]}_delta' for i in order]
+    )
+    result.insert(0, 'timestamp', pd.to_datetime(times, unit='s'))
+    result['average_price'] = average
+    return result
+
+
+CANDLE_COLUMNS = ['TIMESTAMP', 'OPEN', 'HIGH', 'LOW', 'CLOSE', 'VOLUME']
+# Bar length in seconds per candle endpoint
+BAR_SECONDS = {"minutes": 60, "hours": 3600, "days": 86400}
+# Days of daily volume kept per instrument, the most CCData returns at once
+VOLUME_HISTORY_DAYS = 1000
+
+
+class CandleRepository:
+    """
+    Keeps parsed OHLCV frames per (exchange, instrument, interval) so every
+    indicator widget on a dashboard shares one download.
+
+    A frame is served as is for its interval's TTL. After that only the bars
+    since the last stored one are fetched, including the last stored bar as
+    it was still in progress. The least recently used series are dropped
+    beyond `max_series`.
+
+    With a history store, series are also kept on disk and shared between
+    workers: a series another worker refreshed more recently is mapped from
+    its table, and refreshes hold the table's lock so only one worker fetches.
+
+    Args:
+        fetch (Callable): Coroutine function (exchange, instrument, interval,
+            limit) returning CCData candle dicts, raising on failures.
+        ttls (Dict[str, float]): Seconds a frame stays fresh, by interval.
+        max_series (int): Number of series kept in memory.
+        store (HistoryStore): Optional. Store persisting the series.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable,
+        ttls: Dict[str, float],
+        max_series: int = 128,
+        store: HistoryStore = None
+    ):
+        self.fetch = fetch
+        self.ttls = ttls
+        self.max_series = max_series
+        self.store = store
+        self._series: OrderedDict = OrderedDict()
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(exchange: str, instrument: str, interval: str) -> Tuple[str, str, str]:
+        interval = "days" if interval == "day" else interval
+        if interval not in BAR_SECONDS:
+            raise ValueError(f"Unsupported interval: {interval}")
+        return exchange.lower(), instrument.upper(), interval
+
+    @staticmethod
+    def _parse(data: List[Dict]) -> pd.DataFrame:
+        df = pd.DataFrame(data, columns=CANDLE_COLUMNS)
+        df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'], unit='s')
+        return df
+
+    @staticmethod
+    def _table(key: Tuple) -> str:
+        return "ccdata/candles/" + "/".join(key)
+
+    def _store(self, key: Tuple, df: pd.DataFrame, limit: int, fetched_at: float = None):
+        self._series[key] = (time.time() if fetched_at is None else fetched_at, limit, df)
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            evicted, _ = self._series.popitem(last=False)
+            self._locks.pop(evicted, None)
+
+    async def _sync(self, key: Tuple):
+        """Takes over the stored table when it is newer than the series in memory."""
+        table = self._table(key)
+        updated_at = self.store.updated_at(table)
+        entry = self._series.get(key)
+        if updated_at is None or (entry is not None and entry[0] >= updated_at):
+            return
+        df = await self.store.read(table, track=False)
+        metadata = await self.store.read_metadata(table)
+        if df is not None:
+            self._store(key, df, metadata.get("limit", len(df)), fetched_at=updated_at)
+
+    def _fresh(self, key: Tuple, limit: int):
+        """Returns the series in memory if it covers limit and is within its TTL."""
+        entry = self._series.get(key)
+        if entry is not None:
+            fetched_at, stored_limit, stored = entry
+            if stored_limit >= limit and time.time() - fetched_at < self.ttls.get(key[2], 60):
+                self._series.move_to_end(key)
+                return stored
+        return None
+
+    async def _load(self, key: Tuple, limit: int) -> pd.DataFrame:
+        if self.store is not None:
+            await self._sync(key)
+        df = self._fresh(key, limit)
+        if df is not None:
+            return df
+        if self.store is None:
+            return await self._refresh(key, limit)
+
+        table = self._table(key)
+        async with self.store.lock(table):
+            # Another worker may have refreshed the series while we waited
+            await self._sync(key)
+            df = self._fresh(key, limit)
+            if df is not None:
+                return df
+            df = await self._refresh(key, limit)
+            stored_limit = self._series[key][1]
+            await self.store.write(table, df, metadata={"limit": stored_limit})
+            self._store(key, df, stored_limit, fetched_at=self.store.updated_at(table))
+            return df
+
+    async def _refresh(self, key: Tuple, limit: int) -> pd.DataFrame:
+        exchange, instrument, interval = key
+        entry = self._series.get(key)
+        if entry is not None:
+            _, stored_limit, stored = entry
+            if stored_limit >= limit and not stored.empty:
+                last = stored['TIMESTAMP'].iloc[-1]
+                missing = int((pd.Timestamp.now(tz="UTC").tz_localize(None) - last).total_seconds()
+                              // BAR_SECONDS[interval]) + 2
+                if missing < stored_limit:
+                    tail = self._parse(await self.fetch(exchange, instrument, interval, missing))
+                    merged = (
+                        pd.concat([stored, tail], ignore_index=True)
+                        .drop_duplicates(subset='TIMESTAMP', keep='last')
+                        .sort_values('TIMESTAMP')
+                        .iloc[-stored_limit:]
+                        .reset_index(drop=True)
+                    )
+                    self._store(key, merged, stored_limit)
+                    return merged
+
+        df = self._parse(await self.fetch(exchange, instrument, interval, limit))
+        self._store(key, df, limit)
+        return df
+
+    async def get(self, exchange: str, instrument: str, interval: str, limit: int = 2000) -> pd.DataFrame:
+        """
+        Returns up to `limit` of the most recent candles of an instrument.
+
+        Returns:
+            pd.DataFrame: TIMESTAMP (datetime), OPEN, HIGH, LOW, CLOSE and
+                VOLUME columns, oldest first. The frame is a copy the caller
+                may modify.
+        """
+        key = self._key(exchange, instrument, interval)
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            df = await self._load(key, limit)
+            fetched_at = self._series[key][0]
+        record_dependency(f"candles:{'/'.join(key)}", fetched_at, fetched_at + self.ttls.get(key[2], 60))
+        return df.iloc[-limit:].reset_index(drop=True)
+
+
 class CCDataService:
     def __init__(self):
         self.api_key = settings.CCDATA_API_KEY
         self.base_url = "https://data-api.cryptocompare.com"
         self.headers = {"Content-type": "application/json; charset=UTF-8"}
         self.session_manager = SessionManager()
+        self.cache = get_response_cache()
+        self.governor = get_governor("ccdata")
+        # Seconds a candle response stays fresh, by interval
+        self.candle_ttls = {"minutes": 30, "hours": 300, "days": 1800, "day": 1800}
+        self.history = get_history_store()
+        self.candles = CandleRepository(self._request_candles, self.candle_ttls, store=self.history)
+        self._indicators: OrderedDict = OrderedDict()
+        # Scans get their own repository so they don't evict dashboard series
+        self.scan_candles = CandleRepository(
+            self._request_candles, self.candle_ttls, max_series=settings.SCANNER_MAX_INSTRUMENTS
+        )
+        self._volume_refreshes: Dict[str, asyncio.Task] = {}
         
-        self.exchange_pairs = {
-            "binance": ["BTC-USDC", "BTC-USDT"],
-            "coinbase": ["BTC-USDT", "BTC-USD"],
-            "bybit": ["BTC-USDE", "BTC-USDC", "BTC-USDT"],
-            "okex": ["BTC-USDT", "BTC-USDC"],
-            "cryptodotcom": ["BTC-USD", "BTC-USDT"],
-            "upbit": ["BTC-USDT", "BTC-USDC"],
-            "kraken": ["BTC-USD", "BTC-USDT"],
-            "mexc": ["BTC-USDT", "BTC-USDC"],
+        # Quote currencies tracked per exchange for the VWAP deltas, the pairs
+        # of an asset are "<asset>-<quote>"
+        self.exchange_quotes = {
+            "binance": ["USDC", "USDT"],
+            "coinbase": ["USDT", "USD"],
+            "bybit": ["USDE", "USDC", "USDT"],
+            "okex": ["USDT", "USDC"],
+            "cryptodotcom": ["USD", "USDT"],
+            "upbit": ["USDT", "USDC"],
+            "kraken": ["USD", "USDT"],
+            "mexc": ["USDT", "USDC"],
+        }
+        self.exchange_pairs = self.get_exchange_pairs("BTC")
+
+    def get_exchange_pairs(self, asset: str) -> Dict[str, List[str]]:
+        """Returns the pairs of an asset tracked on each exchange."""
+        asset = asset.upper()
+        return {
+            exchange: [f"{asset}-{quote}" for quote in quotes]
+            for exchange, quotes in self.exchange_quotes.items()
         }
 
     async def _fetch_spot_data(self, exchange_pair: Tuple[str, str], interval: str = "hours", aggregate: int = 1, limit: int = 120) -> List[Dict]:
         """Fetch historical spot data for a specific exchange and trading pair."""
         exchange, pair = exchange_pair
         
-        session = await self.session_manager.get_session(self.headers)
         params = {
             "instrument": pair,
             "market": exchange,
@@ -43,22 +277,142 @@ class CCDataService:
             "api_key": self.api_key
         }
         
-        try:
-            endpoint = "days" if interval == "day" else interval
-            url = f"{self.base_url}/spot/v1/historical/{endpoint}"
-            
-            async with session.get(url, params=params) as response:
-                if response.status != 200:
-                    return []
-                
-                data = await response.json()
-                if 'Data' not in data or not data['Data']:
-                    return []
-                
-                return data['Data']
-                
-        except Exception:
-            return []
+        endpoint = "days" if interval == "day" else interval
+        url = f"{self.base_url}/spot/v1/historical/{endpoint}"
+
+        # Failures, rate limits included, are raised for the caller to handle
+        return await self.cache.fetch(
+            "ccdata",
+            url,
+            params,
+            lambda: self._request_spot_data(url, params),
+            ttl=self.candle_ttls.get(interval)
+        )
+
+    async def _request_candles(self, exchange: str, instrument: str, interval: str, limit: int) -> List[Dict]:
+        """Requests candles directly, bypassing the response cache."""
+        params = {
+            "instrument": instrument,
+            "market": exchange,
+            "limit": limit,
+            "aggregate": 1,
+            "fill": "true",
+            "apply_mapping": "true",
+            "response_format": "JSON",
+            "groups": "OHLC,VOLUME",
+            "api_key": self.api_key
+        }
+        return await self._request_spot_data(f"{self.base_url}/spot/v1/historical/{interval}", params)
+
+    async def get_candles(self, exchange: str, instrument: str, interval: str = "days", limit: int = 2000) -> pd.DataFrame:
+        """Returns the most recent OHLCV candles of an instrument from the candle repository."""
+        return await self.candles.get(exchange, instrument, interval, limit)
+
+    async def get_indicator_frame(self, exchange: str, instrument: str, interval: str = "days") -> pd.DataFrame:
+        """
+        Returns the candles of an instrument with RSI, RSI_MA3, MACD, Signal,
+        Histogram, %K and %D columns. The indicators are only computed for the
+        bars added since the last call, see StreamingIndicators.
+        """
+        candles = await self.get_candles(exchange, instrument, interval)
+        key = self.candles._key(exchange, instrument, interval)
+        state = self._indicators.get(key)
+        if state is None:
+            state = self._indicators[key] = StreamingIndicators()
+        self._indicators.move_to_end(key)
+        while len(self._indicators) > self.candles.max_series:
+            self._indicators.popitem(last=False)
+        return candles.join(state.update(candles))
+
+    async def scan_indicators(
+        self,
+        exchange: str,
+        quote: str = "USDT",
+        interval: str = "hours",
+        limit: int = 200
+    ) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Computes the latest RSI, MACD and stochastic of every active pair of
+        an exchange quoted in `quote`.
+
+        Candles are loaded at most SCANNER_CONCURRENCY at a time, then the
+        indicators of all instruments are computed at once on an
+        instrument x time array.
+
+        Returns:
+            Tuple[pd.DataFrame, List[str]]: One row per instrument, and the
+                instruments whose candles could not be loaded.
+        """
+        # The instrument list is fetched on every scan without a freshness
+        # bound, so a scan is never answered with 304 before it runs
+        record_untracked("ccdata:instruments")
+        suffix = f"-{quote.upper()}"
+        instruments = [
+            instrument for instrument in await self._fetch_exchange_instruments(exchange)
+            if instrument.upper().endswith(suffix)
+        ][:settings.SCANNER_MAX_INSTRUMENTS]
+
+        semaphore = asyncio.Semaphore(settings.SCANNER_CONCURRENCY)
+
+        async def load(instrument: str) -> pd.DataFrame:
+            async with semaphore:
+                return await self.scan_candles.get(exchange, instrument, interval, limit)
+
+        results = await asyncio.gather(*[load(i) for i in instruments], return_exceptions=True)
+
+        loaded, failed = [], []
+        for instrument, result in zip(instruments, results):
+            if isinstance(result, Exception) or result.empty:
+                failed.append(instrument)
+            else:
+                loaded.append((instrument, result))
+
+        columns = ['instrument', 'close', 'change', 'rsi', 'macd', 'macd_signal',
+                   'macd_hist', 'stoch_k', 'stoch_d']
+        if not loaded:
+            return pd.DataFrame(columns=columns), failed
+
+        # Right-align the series so the latest bars share the last column
+        width = max(len(df) for _, df in loaded)
+        arrays = np.full((3, len(loaded), width), np.nan)
+        for row, (_, df) in enumerate(loaded):
+            arrays[:, row, width - len(df):] = df[['HIGH', 'LOW', 'CLOSE']].to_numpy(dtype=float).T
+        high, low, close = arrays
+
+        line, signal, histogram = macd_array(close)
+        k, d = stochastic_array(high, low, close)
+        # Padded bars would count as flat moves, an RSI needs period + 1 real bars
+        rsi_period = 14
+        lengths = np.array([len(df) for _, df in loaded])
+        rsi = rsi_array(close, rsi_period)[:, -1]
+        rsi[lengths <= rsi_period] = np.nan
+        first_close = np.array([df['CLOSE'].iloc[0] for _, df in loaded], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            change = close[:, -1] / first_close - 1
+
+        result = pd.DataFrame({
+            'instrument': [instrument for instrument, _ in loaded],
+            'close': close[:, -1],
+            'change': change,
+            'rsi': rsi,
+            'macd': line[:, -1],
+            'macd_signal': signal[:, -1],
+            'macd_hist': histogram[:, -1],
+            'stoch_k': k[:, -1],
+            'stoch_d': d[:, -1],
+        }, columns=columns)
+        return result, failed
+
+    async def _request_spot_data(self, url: str, params: Dict) -> List[Dict]:
+        session = await self.session_manager.get_session(self.headers, provider="ccdata")
+        status, data = await self.governor.get_json(session, url, params=params)
+        if status != 200:
+            raise Exception(f"Failed to fetch data from CCData API. Status: {status}")
+
+        if 'Data' not in data or not data['Data']:
+            raise Exception("No data returned from CCData API")
+
+        return data['Data']
 
     async def _fetch_exchange_instruments(self, exchange: str, pairs: List[str] = None) -> List[str]:
         '''
@@ -71,7 +425,7 @@ class CCDataService:
         Returns:
             List[str]: List of mapped instruments (e.g., ["BTC-USDT", "ETH-USDT", ...])
         '''
-        session = await self.session_manager.get_session(self.headers)
+        session = await self.session_manager.get_session(self.headers, provider="ccdata")
         params = {
             "instrument_status": "ACTIVE",
             "market": exchange,
@@ -81,128 +435,195 @@ class CCDataService:
         if pairs:
             params["instruments"] = ",".join(pairs)
         
-        async with session.get(f'{self.base_url}/spot/v1/markets/instruments', params=params) as response:
-            data = await response.json()
-            instruments = []
-            
-            if exchange not in data['Data']:
-                return instruments
-                
-            exchange_instruments = data['Data'][exchange].get('instruments', {})
-            for instrument_info in exchange_instruments.values():
-                mapped_instrument = instrument_info.get('MAPPED_INSTRUMENT')
-                if mapped_instrument:
-                    instruments.append(mapped_instrument)
-            
+        status, data = await self.governor.get_json(
+            session, f'{self.base_url}/spot/v1/markets/instruments', params=params
+        )
+        if status != 200:
+            raise Exception(f"Failed to fetch instruments from CCData API. Status: {status}")
+
+        instruments = []
+
+        if exchange not in data['Data']:
             return instruments
 
-    async def get_delta_data(self) -> pd.DataFrame:
-        # Create list of all exchange-pair combinations
-        fetch_tasks = [(exchange, pair) 
-                      for exchange, pairs in self.exchange_pairs.items() 
-                      for pair in pairs]
+        exchange_instruments = data['Data'][exchange].get('instruments', {})
+        for instrument_info in exchange_instruments.values():
+            mapped_instrument = instrument_info.get('MAPPED_INSTRUMENT')
+            if mapped_instrument:
+                instruments.append(mapped_instrument)
 
-        # Fetch all data in parallel using asyncio.gather
-        tasks = [self._fetch_spot_data(task) for task in fetch_tasks]
-        results = await asyncio.gather(*tasks)
-        
-        all_dfs = []
+        return instruments
+
+    async def get_delta_data(self, asset: str = "BTC") -> pd.DataFrame:
+        """
+        Computes the VWAP of an asset on each exchange and its relative
+        difference to the average VWAP across exchanges.
+
+        Returns:
+            pd.DataFrame: timestamp, one <exchange>_delta column per exchange
+                and average_price.
+        """
+        exchange_pairs = self.get_exchange_pairs(asset)
+        fetch_tasks = [(exchange, pair)
+                       for exchange, pairs in exchange_pairs.items()
+                       for pair in pairs]
+
+        results = await asyncio.gather(
+            *[self._fetch_spot_data(task) for task in fetch_tasks], return_exceptions=True
+        )
+
+        frames = []
+        errors = []
         for data, (exchange, pair) in zip(results, fetch_tasks):
-            # Process the data into a DataFrame
-            df = pd.DataFrame(data)[['TIMESTAMP', 'CLOSE', 'QUOTE_VOLUME']]
-            df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'], unit='s')
-            df.columns = ['timestamp', f'{exchange}_{pair.lower()}_price', f'{exchange}_{pair.lower()}_vol']
-            all_dfs.append(df)
-
-        # Rest of the processing remains the same
-        base_df = pd.DataFrame({'timestamp': all_dfs[0]['timestamp'].unique()})
-        
-        vwap_data = []
-        for exchange in self.exchange_pairs.keys():
-            exchange_dfs = [df for df in all_dfs 
-                          if any(col.startswith(f'{exchange}_') for col in df.columns)]
-            
-            if not exchange_dfs:
+            if isinstance(data, Exception):
+                # Not every exchange lists every pair, the others still count
+                errors.append(data)
                 continue
+            df = pd.DataFrame(data, columns=['TIMESTAMP', 'CLOSE', 'QUOTE_VOLUME'])
+            frames.append(pd.DataFrame({
+                'timestamp': df['TIMESTAMP'].to_numpy(),
+                'exchange': exchange,
+                'pair': pair,
+                'price': df['CLOSE'].to_numpy(dtype=float),
+                'volume': df['QUOTE_VOLUME'].to_numpy(dtype=float),
+            }))
 
-            exchange_df = exchange_dfs[0]
-            for df in exchange_dfs[1:]:
-                exchange_df = pd.merge(exchange_df, df, on='timestamp', how='outer')
+        if not frames:
+            if errors:
+                raise errors[0]
+            raise Exception(f"No CCData candles found for {asset.upper()}")
 
-            price_cols = [col for col in exchange_df.columns if col.endswith('_price')]
-            vol_cols = [col for col in exchange_df.columns if col.endswith('_vol')]
+        candles = pd.concat(frames, ignore_index=True)
+        return compute_vwap_deltas(candles, list(exchange_pairs))
 
-            prices = exchange_df[price_cols].values
-            volumes = exchange_df[vol_cols].values
-            weighted_sum = np.sum(prices * volumes, axis=1)
-            total_volume = np.sum(volumes, axis=1)
-            vwap = weighted_sum / total_volume
+    @staticmethod
+    def _volume_table(exchange: str) -> str:
+        return f"ccdata/exchange_volume/{exchange.lower()}"
 
-            vwap_df = pd.DataFrame({
-                'timestamp': exchange_df['timestamp'],
-                f'{exchange}_vwap': vwap
-            })
-            vwap_data.append(vwap_df)
+    async def refresh_exchange_volume(self, exchange: str) -> pd.DataFrame:
+        """
+        Updates the stored daily volume of every active instrument on an exchange.
 
-        result_df = base_df.copy()
-        for vwap_df in vwap_data:
-            result_df = pd.merge(result_df, vwap_df, on='timestamp', how='outer')
+        Instruments already stored only fetch the days since their last bar
+        (the last bar is fetched again as it was still in progress). New
+        instruments fetch their full VOLUME_HISTORY_DAYS history. Older days
+        and instruments no longer active are dropped. The table is locked for
+        the whole refresh, so workers sharing it don't refresh it twice.
 
-        vwap_cols = [col for col in result_df.columns if col.endswith('_vwap')]
-        result_df['average_price'] = result_df[vwap_cols].mean(axis=1)
+        Returns:
+            pd.DataFrame: Long table with timestamp, instrument and volume columns.
+        """
+        name = self._volume_table(exchange)
+        async with self.history.lock(name):
+            stored = await self.history.read(name)
+            if stored is not None and self.history.age(name) < settings.EXCHANGE_VOLUME_REFRESH_INTERVAL:
+                # Refreshed by another worker while we waited for the lock
+                return stored
+            return await self._update_exchange_volume(exchange, name, stored)
 
-        for col in vwap_cols:
-            exchange = col.replace('_vwap', '')
-            result_df[f'{exchange}_delta'] = (
-                (result_df[col] - result_df['average_price']) / result_df['average_price']
-            ) 
+    async def _update_exchange_volume(self, exchange: str, name: str, stored: pd.DataFrame) -> pd.DataFrame:
+        instruments = await self._fetch_exchange_instruments(exchange)
 
-        delta_cols = [col for col in result_df.columns if col.endswith('_delta')]
-        return result_df[['timestamp'] + delta_cols + ['average_price']]
+        last_seen = {}
+        if stored is not None and not stored.empty:
+            last_seen = stored.groupby("instrument", observed=True)["timestamp"].max().to_dict()
 
-    async def get_total_exchange_volume(self, exchange: str) -> pd.DataFrame:
-        instruments = await self._fetch_exchange_instruments(exchange)
-        
-        if not instruments:
-            return pd.DataFrame(columns=['timestamp', 'total_volume'])
-        
-        tasks = [
-            self._fetch_spot_data(
-                (exchange, instrument),
-                interval='day',
-                aggregate=1,
-                limit=1000
-            ) 
-            for instrument in instruments
-        ]
-        
-        results = await asyncio.gather(*tasks)
-        
-        all_dfs = []
-        for data, instrument in zip(results, instruments):
-            if not data:
+        now = pd.Timestamp.now(tz="UTC").tz_localize(None)
+        limits = {}
+        for instrument in instruments:
+            if instrument in last_seen:
+                missing_days = (now - last_seen[instrument]).days
+                limits[instrument] = min(VOLUME_HISTORY_DAYS, max(2, missing_days + 2))
+            else:
+                limits[instrument] = VOLUME_HISTORY_DAYS
+
+        # Straight from the API: the rows are persisted in the history store,
+        # keeping the raw payloads in the response cache too would only pin
+        # them in memory
+        results = await asyncio.gather(*[
+            self._request_candles(exchange, instrument, 'days', limit)
+            for instrument, limit in limits.items()
+        ], return_exceptions=True)
+
+        frames = []
+        for data, instrument in zip(results, limits):
+            if isinstance(data, Exception) or not data:
+                # The stored rows of the instrument are kept, the next refresh retries
                 continue
-                
-            try:
-                df = pd.DataFrame(data)[['TIMESTAMP', 'QUOTE_VOLUME']]
-                df['TIMESTAMP'] = pd.to_datetime(df['TIMESTAMP'], unit='s')
-                df.columns = ['timestamp', f'volume_{instrument.lower()}']
-                all_dfs.append(df)
-            except Exception:
+            df = pd.DataFrame(data, columns=['TIMESTAMP', 'QUOTE_VOLUME'])
+            frames.append(pd.DataFrame({
+                'timestamp': pd.to_datetime(df['TIMESTAMP'], unit='s'),
+                'instrument': instrument,
+                'volume': df['QUOTE_VOLUME'].astype(float),
+            }))
+
+        if not frames:
+            if stored is None:
+                return pd.DataFrame(columns=['timestamp', 'instrument', 'volume'])
+            return stored
+
+        merged = self.history.merge(
+            stored, pd.concat(frames, ignore_index=True), keys=['instrument', 'timestamp']
+        )
+        # Same window as a fresh download: the last VOLUME_HISTORY_DAYS of
+        # the instruments still active, so the table doesn't grow forever
+        cutoff = now.normalize() - pd.Timedelta(days=VOLUME_HISTORY_DAYS)
+        merged = merged[
+            (merged['timestamp'] > cutoff) & merged['instrument'].isin(instruments)
+        ].reset_index(drop=True)
+        await self.history.write(name, merged)
+        return merged
+
+    def _schedule_volume_refresh(self, exchange: str) -> asyncio.Task:
+        """Starts a refresh of an exchange unless one is already running."""
+        task = self._volume_refreshes.get(exchange)
+        if task is None or task.done():
+            task = asyncio.create_task(self.refresh_exchange_volume(exchange))
+            # Failures of unawaited refreshes are dropped, the stored table is kept
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._volume_refreshes[exchange] = task
+        return task
+
+    async def maintain_exchange_volumes(self):
+        """
+        Refreshes every stored exchange volume table once per
+        EXCHANGE_VOLUME_REFRESH_INTERVAL. Meant to run as a background task in
+        every worker, only the history store's writer process refreshes.
+        """
+        while True:
+            if not self.history.is_writer():
+                await asyncio.sleep(60)
                 continue
-            
-        if not all_dfs:
+            for name in self.history.tables("ccdata/exchange_volume"):
+                if self.history.age(name) < settings.EXCHANGE_VOLUME_REFRESH_INTERVAL:
+                    continue
+                try:
+                    await self._schedule_volume_refresh(name.rsplit("/", 1)[-1])
+                except Exception:
+                    # Keep the stored table, the next round retries
+                    pass
+            await asyncio.sleep(60)
+
+    async def get_total_exchange_volume(self, exchange: str) -> pd.DataFrame:
+        name = self._volume_table(exchange)
+        data = await self.history.read(name)
+
+        if data is None:
+            data = await self._schedule_volume_refresh(exchange)
+        elif self.history.age(name) > settings.EXCHANGE_VOLUME_REFRESH_INTERVAL and self.history.is_writer():
+            # Serve what is stored while the newest days are fetched, other
+            # workers leave stored tables to the writer's maintenance loop
+            self._schedule_volume_refresh(exchange)
+
+        if data.empty:
             return pd.DataFrame(columns=['timestamp', 'total_volume'])
-            
-        result_df = all_dfs[0]
-        for df in all_dfs[1:]:
-            result_df = pd.merge(result_df, df, on='timestamp', how='outer')
-            
-        volume_cols = [col for col in result_df.columns if col.startswith('volume_')]
-        result_df['total_volume'] = result_df[volume_cols].sum(axis=1)
-        
-        return result_df[['timestamp', 'total_volume']].sort_values('timestamp')
 
+        return (
+            data.groupby('timestamp', sort=True)['volume']
+            .sum()
+            .rename('total_volume')
+            .reset_index()
+        )
 
     
 if __name__ == "__main__":
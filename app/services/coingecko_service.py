@@ -1,30 +1,89 @@
-from typing import Dict, Optional, Union, List
+from typing import Dict, Optional, Tuple, Union, List
+import time
 import pandas as pd
 import aiohttp
 from app.core.settings import get_settings
 from app.core.session_manager import SessionManager
+from app.core.cache import get_response_cache
+from app.core.history_store import get_history_store
+from app.core.http_cache import record_dependency
+from app.core.rate_limiter import get_governor
+from app.core.search_index import SearchIndex
 from urllib.parse import urlencode
 import asyncio
 
 
 settings = get_settings()
 
+
+class CoinCatalog:
+    """
+    Parsed /coins/list snapshot, searchable by id, symbol and name.
+
+    The table rows and dropdown options are built once per snapshot and
+    shared between requests, treat them as read-only.
+
+    Args:
+        coins (List[Dict]): Coins as returned by /coins/list.
+    """
+
+    def __init__(self, coins: List[Dict]):
+        self.records = [
+            {
+                "id": coin["id"],
+                "symbol": coin["symbol"],
+                "name": coin["name"],
+                **(
+                    {"platforms": ", ".join(coin["platforms"] or {})}
+                    if "platforms" in coin else {}
+                ),
+            }
+            for coin in coins
+        ]
+        self.options = [
+            {
+                "value": coin["id"],
+                "label": f"{coin['name']} ({coin['symbol'].upper()})",
+                "extraInfo": {"description": coin["name"]},
+            }
+            for coin in coins
+        ]
+        self.index = SearchIndex([
+            [coin["id"] for coin in coins],
+            [coin["symbol"] for coin in coins],
+            [coin["name"] for coin in coins],
+        ])
+
+    def search(self, q: str = None, limit: int = None, offset: int = 0) -> List[int]:
+        """Returns the positions of the coins matching q, best first, paginated."""
+        rows = self.index.search(q or "")
+        end = None if limit is None else offset + limit
+        return rows[offset:end].tolist()
+
 class CoinGeckoService:
     def __init__(self):
         self.headers = {"accept": "application/json"}
         self.api_key = settings.COINGECKO_API_KEY
         self.session_manager = SessionManager()
+        self.cache = get_response_cache()
+        self.governor = get_governor("coingecko")
+        # (include_platform, status) -> (built_at, CoinCatalog)
+        self._catalogs: Dict[Tuple[str, str], Tuple[float, CoinCatalog]] = {}
+        self._catalog_lock = asyncio.Lock()
+        self.history = get_history_store()
 
     async def fetch_data(self, url: str) -> Dict:
+        return await self.cache.fetch("coingecko", url, None, lambda: self._request(url))
+
+    async def _request(self, url: str) -> Dict:
         base_url = url + ('&' if '?' in url else '?') + f'x_cg_pro_api_key={self.api_key}'
-        session = await self.session_manager.get_session(self.headers)
-        async with session.get(base_url) as response:
-            data = await response.json()
-            
-            if response.status == 200 and data:
-                return data
-                
-            raise Exception(f"Failed to fetch data from CoinGecko API. Status: {response.status}, Response: {data}")
+        session = await self.session_manager.get_session(self.headers, provider="coingecko")
+        status, data = await self.governor.get_json(session, base_url)
+
+        if status == 200 and data:
+            return data
+
+        raise Exception(f"Failed to fetch data from CoinGecko API. Status: {status}, Response: {data}")
 
     async def get_coin_details(self, coin_id: str) -> Dict:
         '''
@@ -42,15 +101,28 @@ class CoinGeckoService:
         - name
         - platforms
         '''
-        url = f"https://pro-api.coingecko.com/api/v3/coins/list?include_platform={include_platform}&status={status}"
-        data = await self.fetch_data(url)
+        catalog = await self.get_coin_catalog(include_platform, status)
+        return pd.DataFrame(catalog.records)
 
-        if include_platform:
-            df = pd.DataFrame(data)
-            df["platforms"] = df["platforms"].apply(
-                lambda d: ", ".join(d.keys()) if isinstance(d, dict) else ""
-            )
-        return df
+    async def get_coin_catalog(self, include_platform: str = "true", status: str = "active") -> CoinCatalog:
+        '''
+        Returns the indexed coin list, rebuilt once per COINGECKO_CATALOG_TTL
+        rather than on every dropdown lookup.
+        '''
+        key = (str(include_platform).lower(), status)
+        cached = self._catalogs.get(key)
+        if cached is None or time.time() - cached[0] >= settings.COINGECKO_CATALOG_TTL:
+            async with self._catalog_lock:
+                cached = self._catalogs.get(key)
+                if cached is None or time.time() - cached[0] >= settings.COINGECKO_CATALOG_TTL:
+                    url = f"https://pro-api.coingecko.com/api/v3/coins/list?include_platform={key[0]}&status={status}"
+                    data = await self.fetch_data(url)
+                    catalog = await asyncio.to_thread(CoinCatalog, data)
+                    cached = self._catalogs[key] = (time.time(), catalog)
+
+        built_at, catalog = cached
+        record_dependency(f"coingecko:catalog:{key}", built_at, built_at + settings.COINGECKO_CATALOG_TTL)
+        return catalog
     
     async def get_coin_list_market_data(self, coin_ids: Optional[str] = None, category: Optional[str] = None) -> pd.DataFrame:
         '''
@@ -104,6 +176,110 @@ class CoinGeckoService:
         market_cap_data["date"] = pd.to_datetime(market_cap_data["date"], unit="ms")
         return market_cap_data
 
+    @staticmethod
+    def _parse_market_chart(data: Dict) -> pd.DataFrame:
+        prices = pd.DataFrame(data["prices"], columns=["date", "price"])
+        market_cap = pd.DataFrame(data["market_caps"], columns=["date", "market_cap"])
+        volume = pd.DataFrame(data["total_volumes"], columns=["date", "volume"])
+
+        df = prices.merge(market_cap, on="date").merge(volume, on="date")
+        df["date"] = pd.to_datetime(df["date"], unit="ms")
+        # Keep the daily closes, the last point is the live price
+        return df[df["date"].dt.time == pd.to_datetime("00:00:00").time()].reset_index(drop=True)
+
+    @staticmethod
+    def _history_table(coin_id: str) -> str:
+        return f"coingecko/market_chart/{coin_id}"
+
+    async def _fetch_market_chart(self, coin_id: str, days: Union[int, str]) -> pd.DataFrame:
+        url = f"https://pro-api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days={days}&interval=daily"
+        return self._parse_market_chart(await self.fetch_data(url))
+
+    async def get_coin_history(self, coin_id: str) -> pd.DataFrame:
+        '''
+        Returns the full daily history of one coin from the local history
+        store. Only coins never seen before download their whole history,
+        stored coins fetch the days since their last row, at most once per
+        COINGECKO_HISTORY_REFRESH_INTERVAL.
+        Returns a dataframe with the following columns:
+        - date
+        - price
+        - market_cap
+        - volume
+        '''
+        name = self._history_table(coin_id)
+        if self.history.age(name) < settings.COINGECKO_HISTORY_REFRESH_INTERVAL:
+            return (await self.history.read(name)).copy()
+
+        async with self.history.lock(name):
+            stored = await self.history.read(name)
+            if stored is None or stored.empty:
+                await self.history.write(name, await self._fetch_market_chart(coin_id, "max"))
+                return (await self.history.read(name)).copy()
+            if self.history.age(name) < settings.COINGECKO_HISTORY_REFRESH_INTERVAL:
+                return stored.copy()
+
+            today = pd.Timestamp.now(tz="UTC").tz_localize(None).normalize()
+            missing_days = (today - stored["date"].iloc[-1]).days
+            try:
+                recent = await self._fetch_market_chart(coin_id, max(2, missing_days + 1))
+            except Exception:
+                # Serve the stored history, the next request tries again
+                return stored.copy()
+
+            merged = (
+                pd.concat([stored, recent], ignore_index=True)
+                .drop_duplicates(subset="date", keep="last")
+                .sort_values("date")
+            )
+            # Rewritten even without new rows, which restarts the refresh interval
+            await self.history.write(name, merged)
+            return merged.reset_index(drop=True)
+
+    async def get_market_histories(
+        self,
+        coin_ids: List[str],
+        retries: int = 2
+    ) -> Tuple[pd.DataFrame, Dict[str, str]]:
+        '''
+        Fetches the daily history of many coins, at most
+        COINGECKO_HISTORY_CONCURRENCY at a time. Each coin is retried with
+        a backoff, and coins that still fail are reported instead of
+        failing the whole batch.
+
+        Returns:
+            Tuple[pd.DataFrame, Dict[str, str]]: date, price, market_cap,
+                volume and coingecko_id of the coins that loaded, and the
+                error of each coin that didn't.
+        '''
+        semaphore = asyncio.Semaphore(settings.COINGECKO_HISTORY_CONCURRENCY)
+
+        async def load(cid: str) -> pd.DataFrame:
+            for attempt in range(retries + 1):
+                try:
+                    async with semaphore:
+                        df = await self.get_coin_history(cid)
+                    df["coingecko_id"] = cid
+                    return df
+                except Exception:
+                    if attempt == retries:
+                        raise
+                # Back off without holding a slot other coins could use
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+        results = await asyncio.gather(*[load(cid) for cid in coin_ids], return_exceptions=True)
+
+        frames, failed = [], {}
+        for cid, result in zip(coin_ids, results):
+            if isinstance(result, Exception):
+                failed[cid] = str(result)
+            else:
+                frames.append(result)
+
+        if not frames:
+            return pd.DataFrame(columns=["date", "price", "market_cap", "volume", "coingecko_id"]), failed
+        return pd.concat(frames, ignore_index=True), failed
+
     async def get_market_data(self, coin_id: Union[str, List[str]]) -> pd.DataFrame:
         '''
         Returns a dataframe with the following columns:
@@ -118,46 +294,22 @@ class CoinGeckoService:
             - market_cap
             - volume
             - coingecko_id
+        Use get_market_histories to keep the coins that loaded when some fail.
         '''
         # Handle single coin case (maintain existing behavior)
         if isinstance(coin_id, str):
-            url = f"https://pro-api.coingecko.com/api/v3/coins/{coin_id}/market_chart?vs_currency=usd&days=max&interval=daily"
-            data = await self.fetch_data(url)
-
-            prices = pd.DataFrame(data["prices"], columns=["date", f"{coin_id}_price"])
-            market_cap = pd.DataFrame(
-                data["market_caps"], columns=["date", f"{coin_id}_market_cap"]
-            )
-            volume = pd.DataFrame(
-                data["total_volumes"], columns=["date", f"{coin_id}_volume"]
-            )
+            df = await self.get_coin_history(coin_id)
+            return df.rename(columns={
+                "price": f"{coin_id}_price",
+                "market_cap": f"{coin_id}_market_cap",
+                "volume": f"{coin_id}_volume",
+            })
 
-            df = prices.merge(market_cap, on="date").merge(volume, on="date")
-            df["date"] = pd.to_datetime(df["date"], unit="ms")
-            df = df[df["date"].dt.time == pd.to_datetime("00:00:00").time()]
-            return df
-
-        # Handle multiple coins case
-        async def fetch_single_coin(cid: str) -> pd.DataFrame:
-            url = f"https://pro-api.coingecko.com/api/v3/coins/{cid}/market_chart?vs_currency=usd&days=max&interval=daily"
-            data = await self.fetch_data(url)
-            
-            prices = pd.DataFrame(data["prices"], columns=["date", "price"])
-            market_cap = pd.DataFrame(data["market_caps"], columns=["date", "market_cap"])
-            volume = pd.DataFrame(data["total_volumes"], columns=["date", "volume"])
-            
-            df = prices.merge(market_cap, on="date").merge(volume, on="date")
-            df["date"] = pd.to_datetime(df["date"], unit="ms")
-            df = df[df["date"].dt.time == pd.to_datetime("00:00:00").time()]
-            df["coingecko_id"] = cid
-            return df
-
-        # Fetch all coins concurrently
-        tasks = [fetch_single_coin(cid) for cid in coin_id]
-        results = await asyncio.gather(*tasks)
-        
-        # Combine all dataframes
-        return pd.concat(results, ignore_index=True)
+        df, failed = await self.get_market_histories(coin_id)
+        if failed:
+            cid, error = next(iter(failed.items()))
+            raise Exception(f"Failed to fetch market data for {len(failed)} coins, {cid}: {error}")
+        return df
 
     async def get_dominance(self, coin_id: str) -> pd.DataFrame:
         '''
@@ -3,6 +3,8 @@ import pandas as pd
 import aiohttp
 from app.core.settings import get_settings
 from app.core.session_manager import SessionManager
+from app.core.cache import get_response_cache
+from app.core.rate_limiter import get_governor
 
 settings = get_settings()
 
@@ -13,16 +15,22 @@ class GeckoTerminalService:
             "x-cg-pro-api-key": settings.COINGECKO_API_KEY
         }
         self.session_manager = SessionManager()
+        self.cache = get_response_cache()
+        self.governor = get_governor("geckoterminal")
 
     async def fetch_data(self, url: str, params: Dict = None) -> Dict:
-        session = await self.session_manager.get_session(self.headers)
-        async with session.get(url, params=params) as response:
-            data = await response.json()
-            
-            if response.status == 200 and data:
-                return data
-                
-            raise Exception(f"Failed to fetch data from CoinGecko API. Status: {response.status}, Response: {data}")
+        return await self.cache.fetch(
+            "geckoterminal", url, params, lambda: self._request(url, params)
+        )
+
+    async def _request(self, url: str, params: Dict = None) -> Dict:
+        session = await self.session_manager.get_session(self.headers, provider="geckoterminal")
+        status, data = await self.governor.get_json(session, url, params=params)
+
+        if status == 200 and data:
+            return data
+
+        raise Exception(f"Failed to fetch data from CoinGecko API. Status: {status}, Response: {data}")
 
     async def fetch_coin_market_data(self, network_id: str, coin_ids: str) -> pd.DataFrame:
         url = f"https://pro-api.coingecko.com/api/v3/onchain/networks/{network_id}/tokens/multi/{coin_ids}"
@@ -4,6 +4,8 @@ import requests
 from typing import Dict
 from app.core.settings import get_settings
 from app.core.session_manager import SessionManager
+from app.core.rate_limiter import get_governor
+from app.core.history_store import get_history_store
 settings = get_settings()
 
 
@@ -12,11 +14,43 @@ class GlassnodeService:
     def __init__(self):
         self.api_key = settings.GLASSNODE_API_KEY
         self.session_manager = SessionManager()
-
-    async def fetch_data(self, url: str, params: Dict = None) -> Dict:
-        session = await self.session_manager.get_session()
-        async with session.get(url, params=params) as response:
-            return await response.json()
+        self.governor = get_governor("glassnode")
+        self.history = get_history_store()
+
+    @staticmethod
+    def _history_table(url: str, params: Dict) -> str:
+        metric = url.strip().split("/metrics/", 1)[-1]
+        return f"glassnode/{metric}/{params['a']}/{params['i']}"
+
+    async def fetch_data(self, url: str, params: Dict = None) -> pd.DataFrame:
+        '''
+        Returns the full history of a metric from the local history store,
+        fetched again at most once per GLASSNODE_REFRESH_INTERVAL by whichever
+        worker gets to it first. When a refresh fails the stored history is
+        served. Returns a copy of the t and v columns.
+        '''
+        name = self._history_table(url, params)
+        if self.history.age(name) >= settings.GLASSNODE_REFRESH_INTERVAL:
+            async with self.history.lock(name):
+                if self.history.age(name) >= settings.GLASSNODE_REFRESH_INTERVAL:
+                    try:
+                        # Straight from the API, a stale cached payload would
+                        # restart the refresh interval on old data
+                        data = await self._request(url, params)
+                        await self.history.write(name, pd.DataFrame(data))
+                    except Exception:
+                        if self.history.updated_at(name) is None:
+                            raise
+        return (await self.history.read(name)).copy()
+
+    async def _request(self, url: str, params: Dict = None) -> Dict:
+        session = await self.session_manager.get_session(provider="glassnode")
+        status, data = await self.governor.get_json(session, url, params=params)
+
+        if status == 200:
+            return data
+
+        raise Exception(f"Failed to fetch data from Glassnode API. Status: {status}, Response: {data}")
 
     async def get_price(
         self,
@@ -1,21 +1,96 @@
 # %%
+import asyncio
+import time
 import requests
 import pandas as pd
-from typing import Dict
+from typing import Callable, Dict
 from app.core.session_manager import SessionManager
+from app.core.http_cache import record_dependency
+from app.core.rate_limiter import get_governor
+from app.core.settings import get_settings
+
+settings = get_settings()
 
 class MicrostrategyService:
     def __init__(self):
         self.url = "https://www.mstr-tracker.com/data"
         self.session_manager = SessionManager()
+        self.governor = get_governor("microstrategy")
+        # One parsed mstr-tracker document backs every widget, and the frames
+        # derived from it are memoized until the document changes.
+        self._snapshot = None
+        self._snapshot_at = 0.0
+        self._snapshot_lock = asyncio.Lock()
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self.snapshot_version = 0
+
+    async def _request(self):
+        session = await self.session_manager.get_session(provider="microstrategy")
+        status, data = await self.governor.get_json(session, self.url)
+
+        if status == 200:
+            return data
+
+        raise Exception(f"Failed to fetch data from mstr-tracker. Status: {status}, Response: {data}")
+
+    def _snapshot_is_fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and time.monotonic() - self._snapshot_at < settings.MICROSTRATEGY_REFRESH_INTERVAL
+        )
+
+    def _record_snapshot(self):
+        fresh_for = settings.MICROSTRATEGY_REFRESH_INTERVAL - (time.monotonic() - self._snapshot_at)
+        record_dependency("microstrategy:snapshot", self.snapshot_version, time.time() + fresh_for)
+
+    async def get_snapshot(self) -> Dict:
+        """
+        Returns the mstr-tracker document, refreshing it once per interval.
+        Refreshes go straight to mstr-tracker rather than through the response
+        cache, whose stale window could hand back an hour old document as new.
+        If a refresh fails the previous document is served until the next try.
+        """
+        if self._snapshot_is_fresh():
+            self._record_snapshot()
+            return self._snapshot
+
+        async with self._snapshot_lock:
+            if self._snapshot_is_fresh():
+                self._record_snapshot()
+                return self._snapshot
 
-    async def fetch_data(self):
-        session = await self.session_manager.get_session()
-        async with session.get(self.url) as response:
-            return await response.json()
+            try:
+                data = await self._request()
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                # Served, but not as fresh, and the next request retries
+                record_dependency("microstrategy:snapshot", self.snapshot_version)
+                return self._snapshot
+
+            if data is not self._snapshot and data != self._snapshot:
+                self._snapshot = data
+                self._frames = {}
+                self.snapshot_version += 1
+            self._snapshot_at = time.monotonic()
+            self._record_snapshot()
+            return self._snapshot
+
+    async def _get_frame(self, name: str, build: Callable[[Dict], pd.DataFrame]) -> pd.DataFrame:
+        data = await self.get_snapshot()
+        if name not in self._frames:
+            self._frames[name] = build(data)
+        # Callers are free to modify what they get back
+        return self._frames[name].copy()
 
     async def get_prices(self):
-        data = await self.fetch_data()
+        return await self._get_frame("prices", self._build_prices)
+
+    async def get_treasury_data(self):
+        return await self._get_frame("treasury", self._build_treasury_data)
+
+    @staticmethod
+    def _build_prices(data: Dict) -> pd.DataFrame:
         df_prices = pd.DataFrame({
             'date': pd.to_datetime(data["dates"]),
             'nav_premium': pd.to_numeric(data["nav_premium"], errors='coerce'),
@@ -23,9 +98,9 @@ class MicrostrategyService:
             'btc_price': pd.to_numeric(data["btc_prices"], errors='coerce')
         })
         return df_prices
-    
-    async def get_treasury_data(self):
-        data = await self.fetch_data()
+
+    @staticmethod
+    def _build_treasury_data(data: Dict) -> pd.DataFrame:
         df_treasury = pd.DataFrame(data['treasury_table'])
         
         column_mappings = {
@@ -0,0 +1,106 @@
+import asyncio
+import base64
+import copy
+import io
+from typing import AsyncIterator, Dict
+import pandas as pd
+from velodata import lib as velo
+from app.core.rate_limiter import get_governor, parse_retry_after
+from app.core.session_manager import SessionManager
+
+
+class AsyncVeloClient:
+    """
+    Asyncio counterpart of velodata's get_rows, running on the shared aiohttp
+    session instead of a blocking requests.Session.
+
+    Request batching is delegated to velodata itself (align_resolution and
+    batch_rows are pure computations), so the pages requested here are exactly
+    the ones the synchronous client would request.
+    """
+
+    base_url = "https://api.velo.xyz/api/v1/"
+
+    def __init__(self, api_key: str, retry: int = 2, chunk_size: int = 1 << 16):
+        token = base64.b64encode(b"api:" + api_key.encode("utf-8")).decode("utf-8")
+        self.headers = {"Authorization": f"Basic {token}"}
+        self.retry = retry
+        self.chunk_size = chunk_size
+        self.session_manager = SessionManager()
+        self.governor = get_governor("velo")
+        self._batcher = velo.client(api_key)
+
+    def _batch_params(self, params: Dict) -> list:
+        batches = self._batcher.batch_rows(copy.deepcopy(params))
+        if isinstance(batches, str):
+            # velodata reports invalid basis requests as a message, not an error
+            raise ValueError(batches)
+        return [{k: str(v) for k, v in batch.items()} for batch in batches]
+
+    async def _read_frames(self, response) -> AsyncIterator[pd.DataFrame]:
+        """Parses a CSV body chunk by chunk as it arrives."""
+        header = None
+        buffer = b""
+        async for chunk in response.content.iter_chunked(self.chunk_size):
+            buffer += chunk
+            cut = buffer.rfind(b"\n")
+            if cut == -1:
+                continue
+            lines, buffer = buffer[:cut + 1], buffer[cut + 1:]
+            if header is None:
+                header_end = lines.find(b"\n") + 1
+                header, lines = lines[:header_end], lines[header_end:]
+            if lines.strip():
+                yield pd.read_csv(io.BytesIO(header + lines))
+
+        if buffer.strip():
+            if header is None:
+                header, buffer = buffer + b"\n", b""
+            if buffer.strip():
+                yield pd.read_csv(io.BytesIO(header + buffer))
+
+    async def _stream_page(self, params: Dict) -> AsyncIterator[pd.DataFrame]:
+        session = await self.session_manager.get_session(self.headers, provider="velo")
+        attempt = 0
+        throttled = 0
+        while True:
+            async with self.governor.slot():
+                async with session.get(self.base_url + "rows", params=params) as response:
+                    if response.status == 200:
+                        self.governor.success()
+                        async for frame in self._read_frames(response):
+                            yield frame
+                        return
+
+                    body = await response.text()
+
+            if response.status == 429 and throttled < self.governor.max_retries:
+                throttled += 1
+                self.governor.backoff(parse_retry_after(response.headers.get("Retry-After")))
+            elif response.status >= 500 and attempt < self.retry:
+                attempt += 1
+                await asyncio.sleep(min(self.governor.max_backoff, 0.5 * 2 ** attempt))
+            else:
+                raise Exception(f"Velo request failed. Status: {response.status}, Response: {body}")
+
+    async def stream_rows(self, params: Dict) -> AsyncIterator[pd.DataFrame]:
+        """
+        Yields DataFrames for a get_rows query as each part of each page is
+        parsed.
+
+        Args:
+            params (Dict): Same parameters as velodata's client.get_rows.
+
+        Yields:
+            pd.DataFrame: Consecutive chunks of rows.
+        """
+        for batch in self._batch_params(params):
+            async for frame in self._stream_page(batch):
+                yield frame
+
+    async def get_rows(self, params: Dict) -> pd.DataFrame:
+        """Returns all rows for a get_rows query as a single DataFrame."""
+        frames = [frame async for frame in self.stream_rows(params)]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
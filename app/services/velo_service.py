@@ -1,7 +1,15 @@
 # %%
-from typing import Dict
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Set, Tuple
 import pandas as pd
 from velodata import lib as velo
+from app.core.executor import BoundedExecutor
+from app.core.history_store import HistoryStore, get_history_store
+from app.core.http_cache import record_untracked
+from app.services.velo_client import AsyncVeloClient
 from app.core.settings import get_settings
 
 settings = get_settings()
@@ -19,11 +27,326 @@ intervals_per_year = {
     '1w': 52       # 52
 }
 
+futures_exchanges = ['binance-futures', 'bybit', 'okex-swap', 'hyperliquid']
+
+
+class VeloRowStore:
+    """
+    Keeps the rows already fetched for each (type, products, exchanges,
+    resolution) series and only asks Velo for what is missing.
+
+    A repeat query fetches the bars after the last stored timestamp, starting
+    `overlap` bars earlier so late revisions of the most recent bars replace
+    the stored values. Asking for an earlier begin fetches just the missing
+    head, and asking for new columns refetches the series with the union of
+    old and new columns. The least recently used series are dropped beyond
+    `max_series`.
+
+    With a history store, a series is also written to disk whenever an
+    update changes it, so series dropped from memory, or never fetched by
+    this worker, are mapped from their table instead of being downloaded
+    again.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable,
+        client,
+        overlap: int,
+        max_series: int,
+        store: HistoryStore = None
+    ):
+        self.fetch = fetch
+        self.client = client
+        self.overlap = overlap
+        self.max_series = max_series
+        self.store = store
+        self._series: OrderedDict = OrderedDict()
+        self._locks: Dict[Tuple, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(params: Dict) -> Tuple:
+        return (
+            params['type'],
+            tuple(params.get('coins') or ()),
+            tuple(params.get('products') or ()),
+            tuple(params.get('exchanges') or ()),
+            params['resolution'],
+        )
+
+    @staticmethod
+    def _table(key: Tuple) -> str:
+        return f"velo/rows/{hashlib.sha1(repr(key).encode()).hexdigest()[:16]}"
+
+    async def _load_stored(self, key: Tuple):
+        """Returns the series' stored entry, or None if it isn't stored."""
+        table = self._table(key)
+        data = await self.store.read(table, track=False)
+        if data is None:
+            return None
+        metadata = await self.store.read_metadata(table)
+        return {
+            'begin': metadata['begin'],
+            'columns': frozenset(metadata['columns']),
+            'data': data,
+        }
+
+    def _aligned(self, params: Dict) -> Tuple[int, int]:
+        """Returns the aligned begin and the bar length in ms for a query."""
+        aligned = self.client.align_resolution({
+            'resolution': params['resolution'],
+            'begin': params['begin'],
+            'end': params['end'],
+        })
+        if 'months' in aligned:
+            step = 1000 * 60 * 60 * 24 * 31 * aligned['resolution']
+        else:
+            step = int(1000 * 60 * aligned['resolution'])
+        return aligned['begin'], step
+
+    async def _fetch_range(self, params: Dict, columns, begin: int, end: int) -> pd.DataFrame:
+        return await self.fetch({
+            **params, 'columns': sorted(columns), 'begin': begin, 'end': end
+        })
+
+    async def get_rows(self, params: Dict) -> pd.DataFrame:
+        """
+        Drop-in replacement for get_rows that reuses stored history.
+
+        Args:
+            params (Dict): Same parameters as velodata's client.get_rows.
+
+        Returns:
+            pd.DataFrame: Rows from the aligned begin up to end.
+        """
+        record_untracked("velo")
+        key = self._key(params)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        begin, step = self._aligned(params)
+        end = int(params['end'])
+        columns = frozenset(params['columns'])
+
+        async with lock:
+            entry = self._series.get(key)
+            if entry is None and self.store is not None:
+                entry = await self._load_stored(key)
+
+            if entry is None or entry['data'].empty or not columns <= entry['columns']:
+                if entry is not None:
+                    columns = columns | entry['columns']
+                    begin = min(begin, entry['begin'])
+                data = await self._fetch_range(params, columns, begin, end)
+                entry = {'begin': begin, 'columns': columns, 'data': data}
+                changed = True
+            else:
+                # The cached entry is only replaced once every fetch succeeded,
+                # so a failed tail never leaves it claiming a head it lacks
+                frames = []
+                if begin < entry['begin']:
+                    frames.append(
+                        await self._fetch_range(params, entry['columns'], begin, entry['begin'])
+                    )
+                frames.append(entry['data'])
+                tail_begin = int(entry['data']['time'].max()) - self.overlap * step
+                frames.append(
+                    await self._fetch_range(params, entry['columns'], tail_begin, end)
+                )
+
+                data = pd.concat([f for f in frames if not f.empty], ignore_index=True)
+                id_columns = [c for c in data.columns if c not in entry['columns']]
+                data = data.drop_duplicates(subset=id_columns, keep='last')
+                data = data.sort_values('time', kind='stable', ignore_index=True)
+                # Only the refetched tail can be revised, anything else adds rows
+                stored_tail = entry['data'][entry['data']['time'] >= tail_begin]
+                changed = (
+                    begin < entry['begin']
+                    or len(data) != len(entry['data'])
+                    or not data[data['time'] >= tail_begin].reset_index(drop=True).equals(
+                        stored_tail.reset_index(drop=True)
+                    )
+                )
+                entry = {
+                    'begin': min(begin, entry['begin']),
+                    'columns': entry['columns'],
+                    'data': data,
+                }
+
+            if self.store is not None and changed:
+                table = self._table(key)
+                async with self.store.lock(table):
+                    await self.store.write(table, entry['data'], metadata={
+                        'begin': int(entry['begin']), 'columns': sorted(entry['columns'])
+                    })
+
+            self._series[key] = entry
+            self._series.move_to_end(key)
+            while len(self._series) > self.max_series:
+                evicted, _ = self._series.popitem(last=False)
+                self._locks.pop(evicted, None)
+
+        data = entry['data']
+        if data.empty:
+            return data
+        data = data[data['time'] >= begin]
+        extra = [c for c in entry['columns'] - frozenset(params['columns']) if c in data.columns]
+        return data.drop(columns=extra)
+
+
+class FuturesQueryPlanner:
+    """
+    Merges futures row queries for the same (coin, begin, resolution) into one
+    wide get_rows call.
+
+    Requests arriving within `window` seconds of each other are batched and
+    fetched once with the union of their columns. The wide result is kept for
+    `ttl` seconds so later requests for a subset of those columns are sliced
+    from it instead of going upstream.
+    """
+
+    def __init__(self, fetch: Callable, window: float, ttl: float):
+        self.fetch = fetch
+        self.window = window
+        self.ttl = ttl
+        self._pending: Dict[Tuple, dict] = {}
+        self._results: Dict[Tuple, Tuple[float, frozenset, pd.DataFrame]] = {}
+        # Running batches, referenced until done so they aren't collected
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _fresh_result(self, key: Tuple):
+        result = self._results.get(key)
+        if result and time.monotonic() - result[0] < self.ttl:
+            return result
+        return None
+
+    async def get(
+        self, 
+        coin: str, 
+        begin: int, 
+        resolution: str, 
+        columns: Iterable[str]
+    ) -> pd.DataFrame:
+        """
+        Returns futures rows for the coin across futures_exchanges with only the
+        requested value columns (plus time, exchange and product columns).
+        """
+        record_untracked("velo")
+        key = (coin, begin, resolution)
+        columns = frozenset(columns)
+
+        result = self._fresh_result(key)
+        if result and columns <= result[1]:
+            return self._slice(result[2], result[1], columns)
+
+        batch = self._pending.get(key)
+        if batch is None or (batch['started'] and not columns <= batch['columns']):
+            batch = {
+                'columns': set(),
+                'started': False,
+                'future': asyncio.get_running_loop().create_future(),
+            }
+            self._pending[key] = batch
+            task = asyncio.create_task(self._run(key, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch['columns'] |= columns
+
+        data, fetched_columns = await asyncio.shield(batch['future'])
+        return self._slice(data, fetched_columns, columns)
+
+    async def _run(self, key: Tuple, batch: dict):
+        await asyncio.sleep(self.window)
+        batch['started'] = True
+        coin, begin, resolution = key
+
+        # Keep the columns of a still fresh result so the cache never narrows
+        result = self._fresh_result(key)
+        columns = frozenset(batch['columns'] | (result[1] if result else set()))
+        batch['columns'] = set(columns)
+
+        try:
+            data = await self.fetch({
+                'type': 'futures',
+                'columns': sorted(columns),
+                'exchanges': futures_exchanges,
+                'coins': [coin],
+                'begin': begin,
+                'end': int(time.time() * 1000),
+                'resolution': resolution
+            })
+        except Exception as e:
+            batch['future'].set_exception(e)
+            # Mark as retrieved, the waiting requests re-raise it
+            batch['future'].exception()
+        else:
+            now = time.monotonic()
+            self._results = {
+                k: v for k, v in self._results.items() if now - v[0] < self.ttl
+            }
+            self._results[key] = (now, columns, data)
+            batch['future'].set_result((data, columns))
+        finally:
+            if self._pending.get(key) is batch:
+                del self._pending[key]
+
+    @staticmethod
+    def _slice(data: pd.DataFrame, fetched: frozenset, requested: frozenset) -> pd.DataFrame:
+        extra = [col for col in fetched - requested if col in data.columns]
+        return data.drop(columns=extra)
+
+
 class VeloService:
     def __init__(self):
         self.client = velo.client(settings.VELO_API_KEY)
+        self.rows_client = AsyncVeloClient(settings.VELO_API_KEY)
+        self._catalog: Dict[str, tuple] = {}
+        self._catalog_locks: Dict[str, asyncio.Lock] = {}
+        self._listing_begin: Dict[str, int] = {}
+        self.row_store = VeloRowStore(
+            self._get_rows,
+            self.client,
+            overlap=settings.VELO_TAIL_OVERLAP,
+            max_series=settings.VELO_STORE_MAX_SERIES,
+            store=get_history_store()
+        )
+        self.futures_planner = FuturesQueryPlanner(
+            self.row_store.get_rows,
+            window=settings.VELO_QUERY_WINDOW,
+            ttl=settings.VELO_QUERY_TTL
+        )
+        # The velodata client blocks on network I/O, so every call goes
+        # through a dedicated pool instead of the event loop.
+        self.executor = BoundedExecutor(
+            name="velo",
+            max_workers=settings.VELO_MAX_WORKERS,
+            max_queue=settings.VELO_MAX_QUEUE,
+            timeout=settings.VELO_CALL_TIMEOUT
+        )
+
+    async def run(self, func, *args, **kwargs):
+        """Runs one of the blocking service methods on the Velo executor."""
+        return await self.executor.run(func, *args, **kwargs)
+
+    async def _get_rows(self, params: Dict) -> pd.DataFrame:
+        """
+        Fetches rows with one concurrent request per exchange and coin, so a
+        slow exchange doesn't serialize the others behind it.
+        """
+        requests = []
+        for exchange in params.get('exchanges') or [None]:
+            for coin in params.get('coins') or [None]:
+                split_params = dict(params)
+                if exchange is not None:
+                    split_params['exchanges'] = [exchange]
+                if coin is not None:
+                    split_params['coins'] = [coin]
+                requests.append(split_params)
+
+        results = await asyncio.gather(
+            *[self.rows_client.get_rows(request) for request in requests]
+        )
+        return pd.concat(results, ignore_index=True)
     
-    def get_ohlcv(self, symbol: str, exchange: str, resolution: str = "10m") -> pd.DataFrame:
+    async def get_ohlcv(self, symbol: str, exchange: str, resolution: str = "10m") -> pd.DataFrame:
         """
         Get OHLCV data for a given symbol and exchange.
         
@@ -48,31 +371,71 @@ class VeloService:
             'resolution': resolution
         }
 
-        df = self.client.get_rows(params)
+        df = await self.row_store.get_rows(params)
 
         return df[['time', 'open_price', 'high_price', 'low_price', 'close_price', 'coin_volume']]
 
-    def get_futures_products(self) -> pd.DataFrame:
+    async def _get_catalog(self, product_type: str) -> pd.DataFrame:
+        """
+        Returns the product catalog for 'futures', 'spot' or 'options',
+        refreshing it from Velo at most once per VELO_CATALOG_TTL seconds.
+        """
+        record_untracked("velo")
+        cached = self._catalog.get(product_type)
+        if cached and time.monotonic() - cached[0] < settings.VELO_CATALOG_TTL:
+            return cached[1]
+
+        lock = self._catalog_locks.setdefault(product_type, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed it while we were waiting
+            cached = self._catalog.get(product_type)
+            if cached and time.monotonic() - cached[0] < settings.VELO_CATALOG_TTL:
+                return cached[1]
+
+            products = await self.run(self.client.get_products, product_type)
+            data = pd.DataFrame(products)
+            if product_type == 'futures':
+                self._listing_begin = data.groupby('coin')['begin'].min().dropna().astype('int64').to_dict()
+            self._catalog[product_type] = (time.monotonic(), data)
+            return data
+
+    async def _resolve_begin(self, coin: str, begin=None) -> int:
+        """
+        Converts the begin parameter into a timestamp in milliseconds. When no
+        begin is given, the coin's earliest futures listing is used.
+        """
+        if begin is None or begin == '' or begin == "None":
+            await self._get_catalog('futures')
+            if coin not in self._listing_begin:
+                raise ValueError(f"No futures products found for {coin}")
+            return self._listing_begin[coin]
+
+        # Check if begin is already a timestamp in milliseconds
+        try:
+            begin_timestamp = int(begin)
+            if begin_timestamp > 1e11:  # If timestamp is too large (likely in seconds)
+                begin_timestamp = begin_timestamp * 1000
+        except ValueError:
+            # If not a timestamp, treat as date string
+            begin_timestamp = int(pd.Timestamp(begin).timestamp() * 1000)
+        return begin_timestamp
+
+    async def get_futures_products(self) -> pd.DataFrame:
         """Retrieves all available products (tickers)."""
-        products = self.client.get_futures()
-        data = pd.DataFrame(products)
+        data = (await self._get_catalog('futures')).copy()
         data['begin'] = pd.to_datetime(data['begin'], unit='ms')
         return data
     
-    def get_spot_products(self) -> pd.DataFrame:
+    async def get_spot_products(self) -> pd.DataFrame:
         """Retrieves all available products (tickers)."""
-        products = self.client.get_spot()
-        data = pd.DataFrame(products)
-        return data
+        return await self._get_catalog('spot')
     
-    def get_options_products(self) -> pd.DataFrame:
+    async def get_options_products(self) -> pd.DataFrame:
         """Retrieves all available products (tickers)."""
-        products = self.client.get_options()
-        data = pd.DataFrame(products)
-        return data
+        return await self._get_catalog('options')
 
 
-    def oi_weighted_funding_rate(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
+    async def oi_weighted_funding_rate(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
         """
         Calculate the open interest (OI) weighted funding rate for the specified coin.
 
@@ -84,34 +447,12 @@ class VeloService:
         Returns:
         - DataFrame with OI-weighted funding rate and annualized funding rate.
         """
-        if begin is None or begin == '' or begin == "None":
-            # Get futures and grab earliest date
-            future = self.client.get_futures()
-            df = pd.DataFrame(future)
-            df = df[df['coin'] == coin]
-            begin_timestamp = int(df.begin.min())
-        else:
-            # Check if begin is already a timestamp in milliseconds
-            try:
-                begin_timestamp = int(begin)
-                if begin_timestamp > 1e11:  # If timestamp is too large (likely in seconds)
-                    begin_timestamp = begin_timestamp * 1000
-            except ValueError:
-                # If not a timestamp, treat as date string
-                begin_timestamp = int(pd.Timestamp(begin).timestamp() * 1000)
+        begin_timestamp = await self._resolve_begin(coin, begin)
 
-        params = {
-            'type': 'futures',
-            'columns': ['funding_rate', 'coin_open_interest_close', 'close_price'],
-            'exchanges': ['binance-futures', 'bybit', 'okex-swap', 'hyperliquid'],
-            'coins': [coin],
-            'begin': begin_timestamp,
-            'end': self.client.timestamp(),  # Current timestamp
-            'resolution': resolution
-        }
-
-        # Fetch data
-        df = self.client.get_rows(params)
+        # Served from one wide query shared with the other futures widgets
+        df = await self.futures_planner.get(
+            coin, begin_timestamp, resolution, ['funding_rate', 'coin_open_interest_close', 'close_price']
+        )
         df.time = pd.to_datetime(df.time, unit='ms')
 
         # Calculate OI-weighted funding rate
@@ -126,7 +467,7 @@ class VeloService:
         df['oi_weighted_funding_rate_annualized'] = df['oi_weighted_funding_rate'] * intervals_per_year.get(resolution, 365)
         return df[['time', 'oi_weighted_funding_rate_annualized', 'close_price']]
 
-    def funding_rates(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
+    async def funding_rates(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
         """
         Return the funding rate for the specified coin by exchange.
 
@@ -138,34 +479,12 @@ class VeloService:
         Returns:
         - DataFrame with funding rate by exchange.
         """
-        if begin is None or begin == '' or begin == "None":
-            # get futures and grab earliest date
-            future = self.client.get_futures()
-            df = pd.DataFrame(future)
-            df = df[df['coin'] == coin]
-            begin_timestamp = int(df.begin.min())
-        else:
-            # Check if begin is already a timestamp in milliseconds
-            try:
-                begin_timestamp = int(begin)
-                if begin_timestamp > 1e11:  # If timestamp is too large (likely in seconds)
-                    begin_timestamp = begin_timestamp * 1000
-            except ValueError:
-                # If not a timestamp, treat as date string
-                begin_timestamp = int(pd.Timestamp(begin).timestamp() * 1000)
-
-        params = {
-            'type': 'futures',
-            'columns': ['funding_rate'],
-            'exchanges': ['binance-futures', 'bybit', 'okex-swap', 'hyperliquid'],
-            'coins': [coin],
-            'begin': begin_timestamp,
-            'end': self.client.timestamp(),  # current timestamp
-            'resolution': resolution
-        }
+        begin_timestamp = await self._resolve_begin(coin, begin)
 
-        # Fetch data
-        df = self.client.get_rows(params)
+        # Served from one wide query shared with the other futures widgets
+        df = await self.futures_planner.get(
+            coin, begin_timestamp, resolution, ['funding_rate']
+        )
         df.time = pd.to_datetime(df.time, unit='ms')
 
         # Annualize the funding rate
@@ -173,7 +492,7 @@ class VeloService:
 
         return df[['time', 'annualized_funding_rate', 'exchange']]
     
-    def liquidations(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
+    async def liquidations(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
         """
         Return the liquidations for the specified coin by exchange.
 
@@ -185,39 +504,17 @@ class VeloService:
         Returns:
         - DataFrame with liquidations by exchange.
         """
-        if begin is None or begin == '' or begin == "None":
-            # get futures and grab earliest date
-            future = self.client.get_futures()
-            df = pd.DataFrame(future)
-            df = df[df['coin'] == coin]
-            begin_timestamp = int(df.begin.min())
-        else:
-            # Check if begin is already a timestamp in milliseconds
-            try:
-                begin_timestamp = int(begin)
-                if begin_timestamp > 1e11:  # If timestamp is too large (likely in seconds)
-                    begin_timestamp = begin_timestamp * 1000
-            except ValueError:
-                # If not a timestamp, treat as date string
-                begin_timestamp = int(pd.Timestamp(begin).timestamp() * 1000)
-
-        params = {
-            'type': 'futures',
-            'columns': ['close_price', 'buy_liquidations_dollar_volume', 'sell_liquidations_dollar_volume'],
-            'exchanges': ['binance-futures', 'bybit', 'okex-swap', 'hyperliquid'],
-            'coins': [coin],
-            'begin': begin_timestamp,
-            'end': self.client.timestamp(),  # current timestamp
-            'resolution': resolution
-        }
+        begin_timestamp = await self._resolve_begin(coin, begin)
 
-        # Fetch data
-        df = self.client.get_rows(params)
+        # Served from one wide query shared with the other futures widgets
+        df = await self.futures_planner.get(
+            coin, begin_timestamp, resolution, ['close_price', 'buy_liquidations_dollar_volume', 'sell_liquidations_dollar_volume']
+        )
         df.time = pd.to_datetime(df.time, unit='ms')
 
         return df[['time', 'close_price', 'buy_liquidations_dollar_volume', 'sell_liquidations_dollar_volume', 'exchange']]
 
-    def open_interest(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
+    async def open_interest(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
         """
         Return the open interest (OI) for the specified coin by exchange.
 
@@ -229,57 +526,21 @@ class VeloService:
         Returns:
         - DataFrame with OI by exchange.
         """
-        if begin is None or begin == '' or begin == "None":
-            # get futures and grab earliest date
-            future = self.client.get_futures()
-            df = pd.DataFrame(future)
-            df = df[df['coin'] == coin]
-            begin_timestamp = int(df.begin.min())
-        else:
-            # Check if begin is already a timestamp in milliseconds
-            try:
-                begin_timestamp = int(begin)
-                if begin_timestamp > 1e11:  # If timestamp is too large (likely in seconds)
-                    begin_timestamp = begin_timestamp * 1000
-            except ValueError:
-                # If not a timestamp, treat as date string
-                begin_timestamp = int(pd.Timestamp(begin).timestamp() * 1000)
+        begin_timestamp = await self._resolve_begin(coin, begin)
 
-        params = {
-            'type': 'futures',
-            'columns': ['dollar_open_interest_close', 'close_price'],
-            'exchanges': ['binance-futures', 'bybit', 'okex-swap', 'hyperliquid'],
-            'coins': [coin],
-            'begin': begin_timestamp,
-            'end': self.client.timestamp(),  # current timestamp
-            'resolution': resolution
-        }
-
-        # Fetch data
-        df = self.client.get_rows(params)
+        # Served from one wide query shared with the other futures widgets
+        df = await self.futures_planner.get(
+            coin, begin_timestamp, resolution, ['dollar_open_interest_close', 'close_price']
+        )
         df.time = pd.to_datetime(df.time, unit='ms')
 
         return df[['time', 'dollar_open_interest_close', 'close_price', 'exchange']]
     
-    def basis(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
+    async def basis(self, coin='BTC', begin=None, resolution='1d') -> pd.DataFrame:
         """
         Return the basis for the specified coin by exchange.
         """
-        if begin is None or begin == '' or begin == "None":
-            # get futures and grab earliest date
-            future = self.client.get_futures()
-            df = pd.DataFrame(future)
-            df = df[df['coin'] == coin]
-            begin_timestamp = int(df.begin.min())
-        else:
-            # Check if begin is already a timestamp in milliseconds
-            try:
-                begin_timestamp = int(begin)
-                if begin_timestamp > 1e11:  # If timestamp is too large (likely in seconds)
-                    begin_timestamp = begin_timestamp * 1000
-            except ValueError:
-                # If not a timestamp, treat as date string
-                begin_timestamp = int(pd.Timestamp(begin).timestamp() * 1000)
+        begin_timestamp = await self._resolve_begin(coin, begin)
 
         params = {
             'type': 'futures',
@@ -291,7 +552,7 @@ class VeloService:
         }
 
         # Fetch data
-        df = self.client.get_rows(params)
+        df = await self.row_store.get_rows(params)
         df.time = pd.to_datetime(df.time, unit='ms')
 
         return df
@@ -1,12 +1,25 @@
 import pandas as pd
 from typing import Dict, Any
 from app.core.session_manager import SessionManager
+from app.core.cache import get_response_cache
+from app.core.rate_limiter import get_governor
 
 class VirtualsService:
     BASE_URL = "https://api.virtuals.io/api"
     
     def __init__(self):
         self.session_manager = SessionManager()
+        self.cache = get_response_cache()
+        self.governor = get_governor("virtuals")
+
+    async def _request(self, url: str, params: Dict[str, Any]) -> Dict:
+        session = await self.session_manager.get_session(provider="virtuals")
+        status, data = await self.governor.get_json(session, url, params=params)
+
+        if status == 200:
+            return data
+
+        raise Exception(f"Failed to fetch data from Virtuals API. Status: {status}, Response: {data}")
     
     async def get_agents_list(self) -> pd.DataFrame:
         """
@@ -24,10 +37,10 @@ class VirtualsService:
             "pagination[pageSize]": 200
         }
         
-        session = await self.session_manager.get_session()
-        async with session.get(url, params=params) as response:
-            data = await response.json()
-                
+        data = await self.cache.fetch(
+            "virtuals", url, params, lambda: self._request(url, params)
+        )
+
         df = pd.DataFrame(data['data'])
         df = df.fillna("")  # Fill NaN values before converting to dict
         
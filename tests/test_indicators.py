@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.indicators import (
+    StreamingIndicators,
+    compute_indicators,
+    macd,
+    macd_array,
+    rsi,
+    rsi_array,
+    stochastic,
+    stochastic_array,
+)
+
+
+def make_candles(n: int = 300, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n))
+    spread = rng.uniform(0.1, 2, n)
+    return pd.DataFrame({
+        'TIMESTAMP': pd.date_range('2024-01-01', periods=n, freq='min'),
+        'OPEN': close,
+        'HIGH': close + spread,
+        'LOW': close - spread,
+        'CLOSE': close,
+        'VOLUME': rng.uniform(1, 10, n),
+    })
+
+
+def assert_frames_close(actual: pd.DataFrame, expected: pd.DataFrame):
+    np.testing.assert_allclose(
+        actual[expected.columns].to_numpy(dtype=float),
+        expected.to_numpy(dtype=float),
+        rtol=1e-9,
+        atol=1e-9,
+    )
+
+
+def test_streaming_matches_batch():
+    candles = make_candles()
+    assert_frames_close(StreamingIndicators().update(candles), compute_indicators(candles))
+
+
+def test_streaming_refreshes_match_batch():
+    candles = make_candles()
+    indicators = StreamingIndicators()
+    for end in range(50, len(candles) + 1, 7):
+        frame = candles.iloc[:end].copy()
+        # The last bar is still in progress, the next refresh revises it
+        frame.loc[frame.index[-1], ['HIGH', 'CLOSE']] += 0.5
+        assert_frames_close(indicators.update(frame), compute_indicators(frame))
+    assert_frames_close(indicators.update(candles), compute_indicators(candles))
+
+
+def test_streaming_sliding_window_matches_batch():
+    candles = make_candles()
+    indicators = StreamingIndicators()
+    indicators.update(candles.iloc[:200])
+    window = candles.iloc[20:260]
+    # The dropped head is still part of the state, so the window keeps the
+    # values computed over the whole series
+    expected = compute_indicators(candles.iloc[:260]).iloc[20:]
+    assert_frames_close(indicators.update(window), expected)
+
+
+def test_streaming_frames_longer_than_max_rows():
+    candles = make_candles()
+    indicators = StreamingIndicators(max_rows=50)
+    for end in range(100, len(candles) + 1, 25):
+        frame = candles.iloc[:end]
+        assert_frames_close(indicators.update(frame), compute_indicators(frame))
+
+
+@pytest.mark.parametrize('period', [5, 14])
+def test_rsi_array_matches_batch(period):
+    closes = np.stack([make_candles(seed=seed)['CLOSE'].to_numpy() for seed in range(3)])
+    result = rsi_array(closes, period)
+    for row, close in zip(result, closes):
+        np.testing.assert_allclose(row, rsi(pd.Series(close), period).to_numpy(), rtol=1e-9)
+
+
+def test_macd_array_matches_batch():
+    closes = np.stack([make_candles(seed=seed)['CLOSE'].to_numpy() for seed in range(3)])
+    line, signal, histogram = macd_array(closes)
+    for i, close in enumerate(closes):
+        expected = macd(pd.Series(close))
+        np.testing.assert_allclose(line[i], expected['MACD'].to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(signal[i], expected['Signal'].to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(histogram[i], expected['Histogram'].to_numpy(), rtol=1e-9)
+
+
+def test_stochastic_array_matches_batch():
+    frames = [make_candles(seed=seed) for seed in range(3)]
+    # A flat stretch, where the high-low range is zero
+    frames[0].loc[100:130, ['HIGH', 'LOW', 'CLOSE']] = 100.0
+    highs, lows, closes = (np.stack([f[c].to_numpy() for f in frames]) for c in ('HIGH', 'LOW', 'CLOSE'))
+    k, d = stochastic_array(highs, lows, closes)
+    for i, frame in enumerate(frames):
+        expected = stochastic(frame['HIGH'], frame['LOW'], frame['CLOSE'])
+        np.testing.assert_allclose(k[i], expected['%K'].to_numpy(), rtol=1e-9)
+        np.testing.assert_allclose(d[i], expected['%D'].to_numpy(), rtol=1e-9)